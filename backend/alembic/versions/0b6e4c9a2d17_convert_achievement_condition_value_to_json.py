@@ -0,0 +1,48 @@
+"""convert_achievement_condition_value_to_json
+
+Revision ID: 0b6e4c9a2d17
+Revises: f3b8d41e6a92
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e4c9a2d17'
+down_revision: Union[str, None] = 'f3b8d41e6a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite keeps JSON documents as TEXT, so existing rows are read as-is.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.alter_column(
+        'achievements',
+        'condition_value',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=False,
+        postgresql_using='condition_value::jsonb',
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.alter_column(
+        'achievements',
+        'condition_value',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using='condition_value::text',
+    )
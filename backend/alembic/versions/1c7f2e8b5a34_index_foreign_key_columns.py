@@ -0,0 +1,39 @@
+"""index_foreign_key_columns
+
+Revision ID: 1c7f2e8b5a34
+Revises: 0b6e4c9a2d17
+Create Date: 2026-10-16 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7f2e8b5a34'
+down_revision: Union[str, None] = '0b6e4c9a2d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# souvenirs.demo_profile_id and profile_feedback.demo_profile_id are already
+# covered by the leading column of their composite indexes.
+FOREIGN_KEY_INDEXES = (
+    ('breakpoints', 'route_id'),
+    ('mini_quests', 'breakpoint_id'),
+    ('souvenirs', 'route_id'),
+    ('profile_achievements', 'demo_profile_id'),
+    ('profile_achievements', 'achievement_id'),
+)
+
+
+def upgrade() -> None:
+    for table, column in FOREIGN_KEY_INDEXES:
+        op.create_index(f'ix_{table}_{column}', table, [column])
+
+
+def downgrade() -> None:
+    for table, column in reversed(FOREIGN_KEY_INDEXES):
+        op.drop_index(f'ix_{table}_{column}', table_name=table)
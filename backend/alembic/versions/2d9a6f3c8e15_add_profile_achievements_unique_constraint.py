@@ -0,0 +1,38 @@
+"""add_profile_achievements_unique_constraint
+
+Revision ID: 2d9a6f3c8e15
+Revises: 1c7f2e8b5a34
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d9a6f3c8e15'
+down_revision: Union[str, None] = '1c7f2e8b5a34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop duplicate unlocks, keeping the earliest row of each pair
+    op.execute(
+        'DELETE FROM profile_achievements WHERE id NOT IN ('
+        'SELECT MIN(id) FROM profile_achievements GROUP BY demo_profile_id, achievement_id)'
+    )
+    # The unique constraint's leading column covers per-profile lookups
+    op.drop_index('ix_profile_achievements_demo_profile_id', table_name='profile_achievements')
+    with op.batch_alter_table('profile_achievements') as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_profile_achievements_profile_achievement', ['demo_profile_id', 'achievement_id']
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('profile_achievements') as batch_op:
+        batch_op.drop_constraint('uq_profile_achievements_profile_achievement', type_='unique')
+    op.create_index('ix_profile_achievements_demo_profile_id', 'profile_achievements', ['demo_profile_id'])
@@ -0,0 +1,39 @@
+"""add_profile_achievements_covering_index
+
+Revision ID: 3e5b7d1a9f46
+Revises: 2d9a6f3c8e15
+Create Date: 2026-10-16 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e5b7d1a9f46'
+down_revision: Union[str, None] = '2d9a6f3c8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # INCLUDE columns need PostgreSQL 11+; elsewhere the
+    # (demo_profile_id, achievement_id) unique constraint serves the lookup.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.create_index(
+        'ix_profile_achievements_profile_cover',
+        'profile_achievements',
+        ['demo_profile_id'],
+        postgresql_include=['achievement_id', 'unlocked_at'],
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_profile_achievements_profile_cover', table_name='profile_achievements')
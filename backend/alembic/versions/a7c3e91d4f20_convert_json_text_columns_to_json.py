@@ -0,0 +1,61 @@
+"""convert_json_text_columns_to_json
+
+Revision ID: a7c3e91d4f20
+Revises: e4fda692220c
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e91d4f20'
+down_revision: Union[str, None] = 'e4fda692220c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JSON_COLUMNS = (
+    ('demo_profiles', 'user_vector_json'),
+    ('demo_profiles', 'unlocked_routes_json'),
+    ('routes', 'tags_json'),
+    ('souvenirs', 'xp_breakdown_json'),
+)
+
+
+def upgrade() -> None:
+    # SQLite keeps JSON documents as TEXT, so existing rows are read as-is.
+    # On PostgreSQL convert to native JSONB and index route tags.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.Text(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::jsonb',
+        )
+    op.create_index('ix_routes_tags_gin', 'routes', ['tags_json'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_routes_tags_gin', table_name='routes', postgresql_using='gin')
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.Text(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::text',
+        )
@@ -0,0 +1,28 @@
+"""add_souvenir_and_feedback_indexes
+
+Revision ID: c81b5d2e6a4f
+Revises: a7c3e91d4f20
+Create Date: 2026-10-16 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81b5d2e6a4f'
+down_revision: Union[str, None] = 'a7c3e91d4f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_souvenirs_profile_completed', 'souvenirs', ['demo_profile_id', 'completed_at'])
+    op.create_index('ix_profile_feedback_profile_route', 'profile_feedback', ['demo_profile_id', 'route_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_profile_feedback_profile_route', table_name='profile_feedback')
+    op.drop_index('ix_souvenirs_profile_completed', table_name='souvenirs')
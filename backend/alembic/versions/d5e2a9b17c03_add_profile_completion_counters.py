@@ -0,0 +1,78 @@
+"""add_profile_completion_counters
+
+Revision ID: d5e2a9b17c03
+Revises: c81b5d2e6a4f
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e2a9b17c03'
+down_revision: Union[str, None] = 'c81b5d2e6a4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _map_category_to_type(category_name):
+    # Frozen copy of achievement_service._map_category_to_type for the backfill
+    if not category_name:
+        return None
+    lower = category_name.lower()
+    if 'run' in lower or 'jogging' in lower:
+        return 'running'
+    if 'cycling' in lower or 'mountain' in lower or 'bike' in lower:
+        return 'cycling'
+    return 'hiking'
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('demo_profiles') as batch_op:
+        batch_op.add_column(sa.Column('souvenir_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+        batch_op.add_column(sa.Column('total_distance_m', sa.Float(), server_default=sa.text('0'), nullable=False))
+        batch_op.add_column(sa.Column(
+            'completed_types_json',
+            sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'),
+            nullable=True,
+        ))
+
+    # Backfill the counters from existing souvenirs
+    demo_profiles = sa.table(
+        'demo_profiles',
+        sa.column('id', sa.Integer()),
+        sa.column('souvenir_count', sa.Integer()),
+        sa.column('total_distance_m', sa.Float()),
+        sa.column('completed_types_json', sa.JSON()),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT s.demo_profile_id, r.length_meters, r.category_name '
+        'FROM souvenirs s LEFT JOIN routes r ON r.id = s.route_id'
+    ))
+    counters = {}
+    for profile_id, length_meters, category_name in rows:
+        counter = counters.setdefault(profile_id, [0, 0.0, set()])
+        counter[0] += 1
+        counter[1] += length_meters or 0
+        route_type = _map_category_to_type(category_name)
+        if route_type:
+            counter[2].add(route_type)
+
+    for profile_id, (count, distance, types) in counters.items():
+        bind.execute(
+            demo_profiles.update()
+            .where(demo_profiles.c.id == profile_id)
+            .values(souvenir_count=count, total_distance_m=distance, completed_types_json=sorted(types))
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('demo_profiles') as batch_op:
+        batch_op.drop_column('completed_types_json')
+        batch_op.drop_column('total_distance_m')
+        batch_op.drop_column('souvenir_count')
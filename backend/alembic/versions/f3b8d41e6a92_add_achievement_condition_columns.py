@@ -0,0 +1,66 @@
+"""add_achievement_condition_columns
+
+Revision ID: f3b8d41e6a92
+Revises: d5e2a9b17c03
+Create Date: 2026-10-16 11:30:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d41e6a92'
+down_revision: Union[str, None] = 'd5e2a9b17c03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of achievement_service._CONDITION_THRESHOLDS for the backfill:
+# (condition_value key, threshold used when the key is missing)
+CONDITION_THRESHOLDS = {
+    'route_count': ('count', 1),
+    'level': ('level', 5),
+    'xp': ('xp', 1000),
+    'distance': ('distance_km', 50),
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('achievements') as batch_op:
+        batch_op.add_column(sa.Column('condition_threshold', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('condition_target', sa.String(length=20), nullable=True))
+
+    # Backfill the new columns from the JSON condition_value
+    achievements = sa.table(
+        'achievements',
+        sa.column('id', sa.Integer()),
+        sa.column('condition_type', sa.String()),
+        sa.column('condition_value', sa.Text()),
+        sa.column('condition_threshold', sa.Float()),
+        sa.column('condition_target', sa.String()),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(achievements.c.id, achievements.c.condition_type, achievements.c.condition_value)
+    ).all()
+    for achievement_id, condition_type, condition_value in rows:
+        condition = json.loads(condition_value)
+        threshold = CONDITION_THRESHOLDS.get(condition_type)
+        bind.execute(
+            achievements.update()
+            .where(achievements.c.id == achievement_id)
+            .values(
+                condition_threshold=condition.get(*threshold) if threshold else None,
+                condition_target=condition.get('type') if condition_type == 'route_type' else None,
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('achievements') as batch_op:
+        batch_op.drop_column('condition_target')
+        batch_op.drop_column('condition_threshold')
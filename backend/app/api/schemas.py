@@ -2,10 +2,30 @@
 Pydantic schemas for API request/response models.
 These schemas provide type validation and automatic API documentation.
 """
+import json
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Any, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, BeforeValidator, ConfigDict
+
+
+def _dump_json_document(value: Any) -> Optional[str]:
+    """Serialize a JSON column value back to the string form the frontend parses."""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _load_json_document(value: Any) -> Any:
+    """Parse JSON strings sent by clients so they are stored as native JSON."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+# JSON columns are exposed as JSON-encoded strings (e.g. tags_json, xp_breakdown_json)
+JSONString = Annotated[Optional[str], BeforeValidator(_dump_json_document)]
+JSONDocumentInput = Annotated[Any, BeforeValidator(_load_json_document)]
 
 
 # ============================================================================
@@ -49,7 +69,7 @@ class RouteResponse(BaseModel):
     short_description: Optional[str] = None
     location: Optional[str] = None
     elevation: Optional[int] = None
-    tags_json: Optional[str] = None
+    tags_json: JSONString = None
     xp_required: int
     base_xp_reward: int
     story_prologue_title: Optional[str] = None
@@ -93,9 +113,9 @@ class ProfileUpdate(BaseModel):
     
     total_xp: Optional[int] = None
     level: Optional[int] = None
-    user_vector_json: Optional[str] = None
+    user_vector_json: JSONDocumentInput = None
     genai_welcome_summary: Optional[str] = None
-    unlocked_routes_json: Optional[str] = None
+    unlocked_routes_json: JSONDocumentInput = None
 
 
 class ProfileResponse(BaseModel):
@@ -104,9 +124,9 @@ class ProfileResponse(BaseModel):
     id: int
     total_xp: int
     level: int
-    user_vector_json: Optional[str] = None
+    user_vector_json: JSONString = None
     genai_welcome_summary: Optional[str] = None
-    unlocked_routes_json: Optional[str] = None
+    unlocked_routes_json: JSONString = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -173,7 +193,7 @@ class SouvenirResponse(BaseModel):
     completed_at: datetime
     total_xp_gained: int
     genai_summary: Optional[str] = None
-    xp_breakdown_json: Optional[str] = None
+    xp_breakdown_json: JSONString = None
     pixel_image_svg: Optional[str] = None  # LLM-generated pixel art SVG
     route: Optional[RouteResponse] = None  # Nested route info
 
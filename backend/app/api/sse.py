@@ -0,0 +1,29 @@
+"""
+Server-Sent Events helpers shared by the streaming endpoints.
+"""
+from typing import AsyncIterator
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(payload: dict) -> bytes:
+    """Encode a payload as a Server-Sent Events ``data`` frame."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def sse_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    """
+    Wrap encoded SSE frames in a ``text/event-stream`` response.
+
+    Caching and proxy buffering are disabled so each frame reaches the client
+    as soon as it is produced.
+    """
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
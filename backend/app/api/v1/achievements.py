@@ -9,8 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.entities import Achievement, ProfileAchievement, DemoProfile
 from app.services.achievement_service import (
-    get_all_achievements,
-    get_user_achievements,
+    get_cached_achievements,
+    get_unlock_times,
     check_and_unlock_achievements,
 )
 
@@ -27,7 +27,7 @@ async def list_achievements(
     Returns:
         List of all achievements with their definitions
     """
-    achievements = await get_all_achievements(db)
+    achievements = await get_cached_achievements(db)
     return [
         {
             "id": a.id,
@@ -36,7 +36,7 @@ async def list_achievements(
             "description": a.description,
             "icon": a.icon,
             "condition_type": a.condition_type,
-            "condition_value": a.condition_value,
+            "condition_value": a.condition_value_json,
         }
         for a in achievements
     ]
@@ -70,23 +70,15 @@ async def get_profile_achievements(
         pass
     
     # Get all achievements
-    all_achievements = await get_all_achievements(db)
+    all_achievements = await get_cached_achievements(db)
     
     # Get user's unlocked achievements
-    user_achievements = await get_user_achievements(profile_id, db)
-    unlocked_achievement_ids = {ua.achievement_id for ua in user_achievements}
+    unlock_times = await get_unlock_times(profile_id, db)
     
     # Build response with unlock status
     result = []
     for achievement in all_achievements:
-        is_unlocked = achievement.id in unlocked_achievement_ids
-        unlocked_at = None
-        if is_unlocked:
-            # Find the unlock record
-            for ua in user_achievements:
-                if ua.achievement_id == achievement.id:
-                    unlocked_at = ua.unlocked_at.isoformat()
-                    break
+        unlocked_at = unlock_times.get(achievement.id)
         
         result.append({
             "id": achievement.id,
@@ -94,8 +86,8 @@ async def get_profile_achievements(
             "name": achievement.name,
             "description": achievement.description,
             "icon": achievement.icon,
-            "unlocked": is_unlocked,
-            "unlocked_at": unlocked_at,
+            "unlocked": unlocked_at is not None,
+            "unlocked_at": unlocked_at.isoformat() if unlocked_at else None,
         })
     
     return result
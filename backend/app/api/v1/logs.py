@@ -6,6 +6,7 @@ This module provides:
 """
 from typing import List, Optional
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, status
@@ -38,6 +39,17 @@ class FrontendLogsRequest(BaseModel):
     timestamp: str
 
 
+@lru_cache(maxsize=1)
+def _get_frontend_log_file() -> Path:
+    """
+    Resolve the frontend log file once, creating its directory on first use.
+    """
+    settings = get_settings()
+    log_dir = Path(settings.log_dir) if hasattr(settings, 'log_dir') else Path("logs")
+    log_dir.mkdir(parents=True, exist_ok=True)
+    return log_dir / "frontend-logs.log"
+
+
 @router.post("/frontend", status_code=status.HTTP_201_CREATED)
 async def receive_frontend_logs(request: FrontendLogsRequest):
     """
@@ -48,11 +60,7 @@ async def receive_frontend_logs(request: FrontendLogsRequest):
     2. A dedicated frontend-logs.log file
     """
     try:
-        settings = get_settings()
-        log_dir = Path(settings.log_dir) if hasattr(settings, 'log_dir') else Path("logs")
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        frontend_log_file = log_dir / "frontend-logs.log"
+        frontend_log_file = _get_frontend_log_file()
         
         # Process each log entry
         error_count = 0
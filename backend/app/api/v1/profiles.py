@@ -3,17 +3,18 @@ Profile API endpoints for user questionnaire submission and profile management.
 
 This module implements:
 - POST /api/profiles - Submit questionnaire and create profile (US-03 & US-04)
+- POST /api/profiles/welcome-summary/stream - Stream a welcome summary (SSE)
 - GET /api/profiles/{id} - Retrieve profile details
 - PATCH /api/profiles/{id} - Update profile
 """
-import json
 import logging
-from typing import Annotated, Optional
+from functools import lru_cache
+from typing import Annotated, AsyncIterator, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
 
 from app.api.schemas import (
     FeedbackCreate,
@@ -24,9 +25,10 @@ from app.api.schemas import (
     ProfileUpdate,
     ProfileStatisticsResponse,
 )
+from app.api.sse import sse_event, sse_response
 from app.database import get_db
 from app.models.entities import DemoProfile, ProfileFeedback, Route, Souvenir, ProfileAchievement
-from app.services.genai_service import generate_welcome_summary
+from app.services.genai_service import generate_welcome_summary, generate_welcome_summary_stream
 from app.services.user_profile_service import (
     generate_fallback_welcome,
     translate_questionnaire_to_vector,
@@ -36,6 +38,7 @@ from app.logger import get_logger, log_request, log_business_logic, log_database
 logger = get_logger(__name__)
 
 
+@lru_cache(maxsize=1024)
 def map_category_to_activity_type(category_name: Optional[str]) -> str:
     """
     Map backend category_name to frontend activity type.
@@ -44,6 +47,9 @@ def map_category_to_activity_type(category_name: Optional[str]) -> str:
     - Running: "Jogging", "Trail running"
     - Cycling: "Cycling", "Mountainbiking", "Long distance cycling"
     - Hiking: "Theme trail", "Hiking trail", and everything else
+    
+    Memoized: there are only a handful of distinct category names, so the
+    lowercasing and substring checks run once per name.
     """
     if not category_name:
         return "hiking"
@@ -128,7 +134,7 @@ async def submit_questionnaire(
     # 3. Create database record
     logger.debug("💾 Creating user profile record...")
     new_profile = DemoProfile(
-        user_vector_json=json.dumps(user_vector, ensure_ascii=False),
+        user_vector_json=user_vector,
         genai_welcome_summary=welcome_summary,
         total_xp=0,
         level=1,
@@ -175,6 +181,46 @@ async def submit_questionnaire(
     )
 
 
+@router.post("/welcome-summary/stream")
+async def stream_welcome_summary(questionnaire: ProfileCreate) -> StreamingResponse:
+    """
+    Stream a personalized welcome summary over Server-Sent Events (US-04).
+    
+    Lets the onboarding screen render the summary while it is still being
+    generated. Each event carries JSON: ``{"type": "token", "content": ...}``
+    for generated text, followed by a final ``{"type": "done"}``. If the
+    GenAI service fails before producing any text, the fallback summary is
+    sent as a single token instead; a failure mid-stream ends with
+    ``{"type": "error"}``.
+    
+    Parameters
+    ----------
+    questionnaire : ProfileCreate
+        User's answers to the onboarding questionnaire
+    
+    Returns
+    -------
+    StreamingResponse
+        ``text/event-stream`` response with the summary events
+    """
+    async def event_generator() -> AsyncIterator[bytes]:
+        sent_any = False
+        try:
+            async for piece in generate_welcome_summary_stream(questionnaire):
+                sent_any = True
+                yield sse_event({"type": "token", "content": piece})
+        except Exception as e:
+            if sent_any:
+                logger.warning(f"⚠️ Welcome summary stream interrupted: {type(e).__name__}: {str(e)}")
+                yield sse_event({"type": "error"})
+                return
+            logger.warning(f"⚠️ GenAI streaming unavailable, using fallback: {type(e).__name__}: {str(e)}")
+            yield sse_event({"type": "token", "content": generate_fallback_welcome(questionnaire)})
+        yield sse_event({"type": "done"})
+    
+    return sse_response(event_generator())
+
+
 @router.get("/{profile_id}", response_model=ProfileResponse)
 async def get_profile(
     profile_id: int,
@@ -444,6 +490,7 @@ async def submit_feedback(
     # This ensures the frontend "Your Preferences" display is up-to-date
     try:
         from app.services.recommendation_service import (
+            RouteView,
             adjust_user_vector_with_feedback,
             extract_route_vector
         )
@@ -455,20 +502,24 @@ async def submit_feedback(
         feedback_result = await db.execute(feedback_query)
         all_feedback = list(feedback_result.scalars().all())
         
-        # Parse current user_vector
+        # Current user_vector (stored as a JSON document)
         if profile.user_vector_json:
-            original_vector = json.loads(profile.user_vector_json)
+            original_vector = profile.user_vector_json
             
             # Build route_vectors dict (only need the current route)
             route_vector = extract_route_vector(route)
             route_vectors = {route.id: route_vector}
             
-            # Also get other routes that have feedback
-            for fb in all_feedback:
-                if fb.route_id != route.id and fb.route_id not in route_vectors:
-                    other_route = await db.get(Route, fb.route_id)
-                    if other_route:
-                        route_vectors[fb.route_id] = extract_route_vector(other_route)
+            # Also get other routes that have feedback, collected in one pass
+            # over the feedback and loaded with a single query
+            other_route_ids = {fb.route_id for fb in all_feedback} - {route.id}
+            if other_route_ids:
+                other_routes = await db.execute(
+                    select(Route.id, Route.difficulty, Route.length_meters, Route.tags_json)
+                    .where(Route.id.in_(other_route_ids))
+                )
+                for row in other_routes.all():
+                    route_vectors[row.id] = extract_route_vector(RouteView(*row))
             
             # Apply feedback adjustments
             adjusted_vector = adjust_user_vector_with_feedback(
@@ -478,7 +529,7 @@ async def submit_feedback(
             )
             
             # Update profile with adjusted vector
-            profile.user_vector_json = json.dumps(adjusted_vector, ensure_ascii=False)
+            profile.user_vector_json = adjusted_vector
             await db.commit()
             
             logger.debug(f"✅ Updated user_vector after feedback: {adjusted_vector}")
@@ -521,53 +572,57 @@ async def get_profile_statistics(
     HTTPException
         404 if profile not found
     """
-    # Validate profile exists
-    profile = await db.get(DemoProfile, profile_id)
-    if profile is None:
+    # Validate profile exists and count its unlocked achievements in one query
+    achievements_count = (
+        select(func.count(ProfileAchievement.id))
+        .where(ProfileAchievement.demo_profile_id == DemoProfile.id)
+        .scalar_subquery()
+    )
+    profile_result = await db.execute(
+        select(DemoProfile.id, achievements_count).where(DemoProfile.id == profile_id)
+    )
+    profile_row = profile_result.one_or_none()
+    if profile_row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Profile with id {profile_id} not found",
         )
+    achievements_unlocked = profile_row[1]
     
-    # Get all souvenirs with routes (no limit for accurate statistics)
+    # Aggregate souvenirs per route category in SQL (no limit for accurate
+    # statistics), so each distinct category is mapped to an activity type once
     souvenirs_result = await db.execute(
-        select(Souvenir)
+        select(
+            Route.category_name,
+            func.count(Souvenir.id),
+            func.coalesce(func.sum(Route.length_meters), 0.0),
+            func.coalesce(func.sum(Route.elevation), 0),
+        )
+        .select_from(Souvenir)
+        .outerjoin(Route, Souvenir.route_id == Route.id)
         .where(Souvenir.demo_profile_id == profile_id)
-        .options(selectinload(Souvenir.route))
+        .group_by(Route.category_name)
     )
-    souvenirs = souvenirs_result.scalars().all()
     
-    # Aggregate statistics from souvenirs
-    total_distance_km = 0.0
+    routes_completed = 0
+    total_distance_m = 0.0
     total_elevation_m = 0
     activity_breakdown = {"running": 0, "hiking": 0, "cycling": 0}
     
-    for souvenir in souvenirs:
-        if souvenir.route:
-            # Sum distance (convert meters to km)
-            if souvenir.route.length_meters:
-                total_distance_km += souvenir.route.length_meters / 1000.0
-            
-            # Sum elevation
-            if souvenir.route.elevation:
-                total_elevation_m += souvenir.route.elevation
-            
-            # Count by activity type
-            if souvenir.route.category_name:
-                activity_type = map_category_to_activity_type(souvenir.route.category_name)
-                activity_breakdown[activity_type] = activity_breakdown.get(activity_type, 0) + 1
-    
-    # Count unlocked achievements
-    achievements_result = await db.execute(
-        select(func.count(ProfileAchievement.id))
-        .where(ProfileAchievement.demo_profile_id == profile_id)
-    )
-    achievements_unlocked = achievements_result.scalar() or 0
+    for category_name, souvenir_count, distance_m, elevation_m in souvenirs_result.all():
+        routes_completed += souvenir_count
+        total_distance_m += distance_m
+        total_elevation_m += elevation_m
+        
+        # Count by activity type
+        if category_name:
+            activity_type = map_category_to_activity_type(category_name)
+            activity_breakdown[activity_type] = activity_breakdown.get(activity_type, 0) + souvenir_count
     
     return ProfileStatisticsResponse(
-        total_distance_km=round(total_distance_km, 1),
+        total_distance_km=round(total_distance_m / 1000.0, 1),
         total_elevation_m=total_elevation_m,
-        routes_completed=len(souvenirs),
+        routes_completed=routes_completed,
         achievements_unlocked=achievements_unlocked,
         activity_breakdown=activity_breakdown,
     )
@@ -11,7 +11,7 @@ from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
 from app.database import get_db
 from app.models.entities import Route, Breakpoint, DemoProfile
@@ -163,7 +163,9 @@ async def generate_route_story(
         select(Route)
         .where(Route.id == route_id)
         .options(
-            selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests)
+            undefer(Route.story_prologue_body),
+            undefer(Route.story_epilogue_body),
+            selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests),
         )
     )
     route = result.scalar_one_or_none()
@@ -202,7 +204,7 @@ async def generate_route_story(
     
     # 3. Generate new story
     logger.info("🤖 Starting new story generation...")
-    story_data = await generate_story_for_route(
+    story_data = generate_story_for_route(
         route=route,
         breakpoints=route.breakpoints,
         narrative_style=request.narrative_style
@@ -262,7 +264,9 @@ async def get_route_story(
         select(Route)
         .where(Route.id == route_id)
         .options(
-            selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests)
+            undefer(Route.story_prologue_body),
+            undefer(Route.story_epilogue_body),
+            selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests),
         )
     )
     route = result.scalar_one_or_none()
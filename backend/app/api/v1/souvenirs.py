@@ -3,18 +3,20 @@ Souvenir API endpoints for route completion and souvenir management.
 
 This module provides endpoints for:
 - POST /api/profiles/{profile_id}/souvenirs - Complete route and create souvenir
+- POST /api/profiles/{profile_id}/souvenirs/summary/stream - Stream the post-run summary
 - GET /api/profiles/{profile_id}/souvenirs - Get all souvenirs for a profile
 - GET /api/profiles/{profile_id}/souvenirs/{souvenir_id} - Get single souvenir
 """
-import json
 import logging
-from typing import Annotated, Optional
+from typing import Annotated, AsyncIterator, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, asc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, desc, asc, func
+from sqlalchemy.orm import selectinload, undefer_group
 
+from app.api.sse import sse_event, sse_response
 from app.database import get_db
 from app.models.entities import DemoProfile, Route, Souvenir, MiniQuest, Breakpoint
 from app.api.schemas import (
@@ -25,8 +27,12 @@ from app.api.schemas import (
     RouteResponse,
 )
 from app.services.xp_calculator import calculate_route_completion_xp
-from app.services.genai_service import generate_post_run_summary, generate_pixel_art_svg
-from app.services.achievement_service import check_and_unlock_achievements
+from app.services.genai_service import (
+    generate_pixel_art_svg,
+    generate_post_run_summary,
+    generate_post_run_summary_stream,
+)
+from app.services.achievement_service import check_and_unlock_achievements, record_completed_route
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +61,7 @@ async def create_souvenir(
     2. Calculates XP breakdown (base + quests + difficulty multiplier)
     3. Generates AI summary (or uses fallback)
     4. Creates Souvenir record
-    5. Updates user profile (total_xp and level)
+    5. Updates user profile (total_xp, level and completion counters)
     6. Returns complete souvenir information
     
     Args:
@@ -86,6 +92,7 @@ async def create_souvenir(
         route_result = await db.execute(
             select(Route)
             .where(Route.id == request.route_id)
+            .options(undefer_group("payload"))  # Payload columns are echoed in the response
         )
         route = route_result.scalar_one_or_none()
         if not route:
@@ -128,7 +135,7 @@ async def create_souvenir(
         try:
             from datetime import datetime, timezone
             route_length_km = (route.length_meters / 1000) if route.length_meters else 0
-            pixel_image_svg = await generate_pixel_art_svg(
+            pixel_image_svg = generate_pixel_art_svg(
                 route_title=route.title,
                 route_location=route.location,
                 completed_at=datetime.now(timezone.utc),
@@ -150,7 +157,7 @@ async def create_souvenir(
             route_id=request.route_id,
             total_xp_gained=xp_breakdown['total'],
             genai_summary=genai_summary,
-            xp_breakdown_json=json.dumps(xp_breakdown, ensure_ascii=False),
+            xp_breakdown_json=xp_breakdown,
             pixel_image_svg=pixel_image_svg
         )
         db.add(new_souvenir)
@@ -160,6 +167,7 @@ async def create_souvenir(
         profile.total_xp += xp_breakdown['total']
         profile.level = calculate_level_from_xp(profile.total_xp)
         new_level = profile.level
+        record_completed_route(profile, route)
         
         await db.commit()
         await db.refresh(new_souvenir)
@@ -211,9 +219,9 @@ async def create_souvenir(
             "route_id": new_souvenir.route_id,
             "completed_at": new_souvenir.completed_at,
             "total_xp_gained": new_souvenir.total_xp_gained,
-            "genai_summary": new_souvenir.genai_summary,
+            "genai_summary": genai_summary,  # Deferred column, use the value just written
             "xp_breakdown_json": new_souvenir.xp_breakdown_json,
-            "pixel_image_svg": new_souvenir.pixel_image_svg,
+            "pixel_image_svg": pixel_image_svg,
             "route": route_dict,
         }
         
@@ -239,6 +247,73 @@ async def create_souvenir(
         )
 
 
+@router.post("/{profile_id}/souvenirs/summary/stream")
+async def stream_post_run_summary(
+    profile_id: int,
+    request: RouteCompleteRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> StreamingResponse:
+    """
+    Stream the post-run summary for a route completion over Server-Sent Events (US-13).
+    
+    Takes the same body as ``POST /{profile_id}/souvenirs`` and can be called
+    just before it, so the completion screen shows the summary while it is
+    being generated. The finished text is cached, so the souvenir request
+    that follows reuses it instead of generating it again.
+    
+    Each event carries JSON: ``{"type": "token", "content": ...}`` for
+    generated text, followed by ``{"type": "done"}``, or ``{"type": "error"}``
+    if generation fails (the souvenir request then falls back as usual).
+    
+    Args:
+        profile_id: User profile ID
+        request: Route completion request with route_id and completed_quest_ids
+        db: Database session
+    
+    Returns:
+        ``text/event-stream`` response with the summary events
+    
+    Raises:
+        HTTPException: 404 if profile or route not found
+    """
+    user_level = await db.scalar(select(DemoProfile.level).where(DemoProfile.id == profile_id))
+    if user_level is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile with id {profile_id} not found"
+        )
+    route_row = (await db.execute(
+        select(Route.title, Route.length_meters).where(Route.id == request.route_id)
+    )).one_or_none()
+    if route_row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Route with id {request.route_id} not found"
+        )
+    
+    # Same inputs as create_souvenir, so both map to the same cached summary
+    quests_completed = len(request.completed_quest_ids)
+    summary_stream = generate_post_run_summary_stream(
+        route_title=route_row.title,
+        route_length_km=(route_row.length_meters / 1000) if route_row.length_meters else 0,
+        quests_completed=quests_completed,
+        total_quests=quests_completed,
+        user_level=user_level
+    )
+    
+    async def event_generator() -> AsyncIterator[bytes]:
+        try:
+            async for piece in summary_stream:
+                yield sse_event({"type": "token", "content": piece})
+        except Exception as e:
+            logger.warning(f"⚠️ Post-run summary stream failed: {type(e).__name__}: {str(e)}")
+            yield sse_event({"type": "error"})
+            return
+        yield sse_event({"type": "done"})
+    
+    return sse_response(event_generator())
+
+
 @router.get("/{profile_id}/souvenirs", response_model=SouvenirListResponse)
 async def get_souvenirs(
     profile_id: int,
@@ -276,7 +351,11 @@ async def get_souvenirs(
     query = (
         select(Souvenir)
         .where(Souvenir.demo_profile_id == profile_id)
-        .options(selectinload(Souvenir.route))  # Only load route, not nested breakpoints
+        .options(
+            undefer_group("payload"),
+            # Only load route, not nested breakpoints
+            selectinload(Souvenir.route).undefer_group("payload"),
+        )
     )
     
     # Apply sorting
@@ -291,9 +370,9 @@ async def get_souvenirs(
     
     # Get total count
     count_result = await db.execute(
-        select(Souvenir).where(Souvenir.demo_profile_id == profile_id)
+        select(func.count(Souvenir.id)).where(Souvenir.demo_profile_id == profile_id)
     )
-    total = len(count_result.scalars().all())
+    total = count_result.scalar_one()
     
     # Apply pagination
     query = query.limit(limit).offset(offset)
@@ -381,7 +460,11 @@ async def get_souvenir(
         select(Souvenir)
         .where(Souvenir.id == souvenir_id)
         .where(Souvenir.demo_profile_id == profile_id)
-        .options(selectinload(Souvenir.route))  # Only load route, not nested breakpoints
+        .options(
+            undefer_group("payload"),
+            # Only load route, not nested breakpoints
+            selectinload(Souvenir.route).undefer_group("payload"),
+        )
     )
     souvenir = result.scalar_one_or_none()
     
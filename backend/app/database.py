@@ -6,6 +6,7 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
@@ -132,6 +133,18 @@ async def get_db():
             await session.close()
 
 
+def dialect_insert(session: AsyncSession):
+    """
+    Return the dialect-specific ``insert`` construct for the session's database.
+
+    Unlike the generic ``sqlalchemy.insert``, these support
+    ``on_conflict_do_nothing`` / ``on_conflict_do_update``.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
 async def get_db_session() -> AsyncSession:
     """
     Get a database session (alternative to context manager).
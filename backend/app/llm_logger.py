@@ -2,14 +2,18 @@
 LLM Logger for real-time UI updates.
 Stores LLM generation outputs in a queue for SSE streaming.
 """
-from collections import deque
+from collections import defaultdict, deque
 from typing import Optional
 from datetime import datetime
-import json
+import orjson
 
 # Global message queue (stores last 50 messages)
 _llm_messages: deque = deque(maxlen=50)
 
+# Ollama metrics: event counters and running [count, sum, max, last] per observed value
+_llm_counters: dict[str, int] = defaultdict(int)
+_llm_observations: dict[str, list[float]] = {}
+
 
 class LLMMessage:
     """Represents a single LLM generation event."""
@@ -20,6 +24,7 @@ class LLMMessage:
         self.title = title
         self.content = content
         self.metadata = metadata or {}
+        self._json: Optional[str] = None
     
     def to_dict(self) -> dict:
         return {
@@ -31,7 +36,10 @@ class LLMMessage:
         }
     
     def to_json(self) -> str:
-        return json.dumps(self.to_dict())
+        # Messages never change once logged, so every SSE client shares one encoding
+        if self._json is None:
+            self._json = orjson.dumps(self.to_dict()).decode()
+        return self._json
 
 
 def log_llm_output(message_type: str, title: str, content: str, metadata: Optional[dict] = None):
@@ -59,4 +67,40 @@ def clear_messages():
     _llm_messages.clear()
 
 
+def increment_llm_counter(name: str, amount: int = 1):
+    """Increment an LLM event counter (e.g. "response_cache_hits")."""
+    _llm_counters[name] += amount
+
+
+def observe_llm_value(name: str, value: float):
+    """Record one observation of an LLM metric (e.g. "prompt_eval_tokens")."""
+    stats = _llm_observations.get(name)
+    if stats is None:
+        _llm_observations[name] = [1, value, value, value]
+    else:
+        stats[0] += 1
+        stats[1] += value
+        stats[2] = max(stats[2], value)
+        stats[3] = value
+
+
+def get_llm_metrics() -> dict:
+    """Get a snapshot of the LLM counters and observation summaries."""
+    return {
+        "counters": dict(_llm_counters),
+        "observations": {
+            name: {
+                "count": int(count),
+                "avg": round(total / count, 2),
+                "max": round(maximum, 2),
+                "last": round(last, 2),
+            }
+            for name, (count, total, maximum, last) in _llm_observations.items()
+        },
+    }
+
 
+def reset_llm_metrics():
+    """Reset all LLM metrics (for testing)."""
+    _llm_counters.clear()
+    _llm_observations.clear()
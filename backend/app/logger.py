@@ -130,14 +130,13 @@ def setup_logging(
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     
     # Log logging system initialization
-    logger = logging.getLogger(__name__)
-    logger.info("=" * 80)
-    logger.info("Logging system initialized")
-    logger.info(f"Log level: {log_level}")
-    logger.info(f"File logging: {'enabled' if enable_file_logging else 'disabled'}")
-    logger.info(f"Console logging: {'enabled' if enable_console_logging else 'disabled'}")
-    logger.info(f"Log directory: {LOG_DIR}")
-    logger.info("=" * 80)
+    logging.getLogger(__name__).debug(
+        "logging init level=%s file=%s console=%s dir=%s",
+        log_level,
+        enable_file_logging,
+        enable_console_logging,
+        LOG_DIR,
+    )
 
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
@@ -276,6 +275,10 @@ def log_api_call(
     **kwargs
         Additional information to log
     """
+    level = logging.INFO if success else logging.ERROR
+    if not logger.isEnabledFor(level):
+        return
+    
     status = "✅" if success else "❌"
     parts = [f"{status} {service} {method} {endpoint}"]
     
@@ -287,7 +290,6 @@ def log_api_call(
         parts.append(extra_info)
     
     message = " | ".join(parts)
-    level = logging.INFO if success else logging.ERROR
     logger.log(level, f"🔌 {message}")
 
 
@@ -2,22 +2,116 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 import re
 import asyncio
-import json
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from .api.v1 import profiles, routes, souvenirs, achievements, logs
 from .database import close_db, init_db, get_db
 from .models.entities import DemoProfile, Route
 from .settings import get_settings
-from .llm_logger import get_recent_messages, _llm_messages
+from .services.genai_service import (
+    check_prompt_context_window,
+    close_ollama_client,
+    get_ollama_client,
+    close_response_cache,
+    prewarm_ollama,
+)
+from .llm_logger import get_llm_metrics, get_recent_messages, _llm_messages
 from .logger import init_logging_from_settings, get_logger
 
 
+# Frontend origins allowed to call the API
+CORS_ALLOWED_ORIGINS = frozenset({
+    "http://localhost:3000",  # Next.js default dev port
+    "http://localhost:3001",  # Alternative port
+    "http://127.0.0.1:3000",
+    "http://127.0.0.1:3001",
+})
+_CORS_ALLOWED_ORIGIN_BYTES = frozenset(origin.encode("latin-1") for origin in CORS_ALLOWED_ORIGINS)
+_CORS_SIMPLE_HEADERS = (
+    (b"access-control-allow-credentials", b"true"),
+    (b"access-control-expose-headers", b"*"),
+)
+
+
+# Dashboard template placeholder, e.g. "{{ statistics.total_users }}"
+_TEMPLATE_VARIABLE_RE = re.compile(r"\{\{ ([\w.]+) \}\}")
+
+
+# Cached SSE heartbeat event: (epoch second, encoded payload)
+_HB_CACHE: tuple[int, bytes] = (0, b"")
+
+
+def _heartbeat_event() -> bytes:
+    """
+    Return the encoded SSE heartbeat, rebuilt at most once per second.
+
+    Heartbeats are lossy keepalives, so second precision is sufficient and all
+    ticks within the same second share one pre-encoded payload.
+    """
+    global _HB_CACHE
+    now_s = int(time.time())
+    if now_s != _HB_CACHE[0]:
+        timestamp = datetime.fromtimestamp(now_s, timezone.utc).isoformat()
+        payload = f'data: {{"type": "heartbeat", "timestamp": "{timestamp}"}}\n\n'.encode()
+        _HB_CACHE = (now_s, payload)
+    return _HB_CACHE[1]
+
+
+class AllowlistCORSMiddleware:
+    """
+    CORS middleware with a set-membership fast path for simple requests.
+
+    Preflight OPTIONS requests are delegated to Starlette's CORSMiddleware.
+    Every other request only needs a single header lookup against the fixed
+    allowlist before the static CORS headers are appended to the response.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.preflight = CORSMiddleware(
+            app,
+            allow_origins=list(CORS_ALLOWED_ORIGINS),
+            allow_credentials=True,
+            allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],  # Explicitly allow OPTIONS
+            allow_headers=["*"],  # Allow all headers
+            expose_headers=["*"],
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] == "OPTIONS":
+            await self.preflight(scope, receive, send)
+            return
+
+        origin = next((value for key, value in scope["headers"] if key == b"origin"), None)
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed = origin in _CORS_ALLOWED_ORIGIN_BYTES
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                if allowed:
+                    headers.append((b"access-control-allow-origin", origin))
+                    headers.extend(_CORS_SIMPLE_HEADERS)
+                headers.append((b"vary", b"Origin"))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -46,13 +140,27 @@ async def lifespan(app: FastAPI):
         # Log but don't fail startup if seeding fails
         logger.warning(f"⚠️ Achievement data seeding failed: {e}", exc_info=True)
     
+    # Open the shared Ollama connection pool now rather than on the first request
+    get_ollama_client()
+    
+    # Warm up Ollama in the background so startup is not blocked on the model
+    check_prompt_context_window()
+    prewarm_task = None
+    if settings.ollama_prewarm:
+        prewarm_task = asyncio.create_task(prewarm_ollama())
+    
     logger.info("🎉 Application startup completed")
     yield
     
     # Shutdown
     logger.info("🛑 Application shutting down...")
+    if prewarm_task is not None and not prewarm_task.done():
+        prewarm_task.cancel()
     await close_db()
     logger.info("✅ Database connections closed")
+    await close_ollama_client()
+    close_response_cache()
+    logger.info("✅ Ollama client and response cache closed")
 
 
 def create_app() -> FastAPI:
@@ -67,19 +175,7 @@ def create_app() -> FastAPI:
     )
 
     # Add CORS middleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[
-            "http://localhost:3000",  # Next.js default dev port
-            "http://localhost:3001",  # Alternative port
-            "http://127.0.0.1:3000",
-            "http://127.0.0.1:3001",
-        ],
-        allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],  # Explicitly allow OPTIONS
-        allow_headers=["*"],  # Allow all headers
-        expose_headers=["*"],
-    )
+    app.add_middleware(AllowlistCORSMiddleware)
 
     @app.get("/", tags=["info"], response_class=HTMLResponse)
     async def root(db: AsyncSession = Depends(get_db)):
@@ -134,19 +230,24 @@ def create_app() -> FastAPI:
             </html>
             """
         
-        # Replace template variables
-        html_content = html_content.replace("{{ version }}", settings.version)
-        html_content = html_content.replace("{{ status }}", "🟢 Operational")
-        html_content = html_content.replace("{{ description }}", "Gamified outdoor adventure platform with AI-powered storytelling")
-        html_content = html_content.replace("{{ statistics.total_users }}", str(stats.get("total_users", 0)))
-        html_content = html_content.replace("{{ statistics.total_routes }}", str(stats.get("total_routes", 0)))
-        html_content = html_content.replace("{{ statistics.total_xp_earned }}", str(stats.get("total_xp_earned", 0)))
-        html_content = html_content.replace("{{ statistics.average_level }}", str(stats.get("average_level", 0.0)))
-        html_content = html_content.replace("{{ database.type }}", db_type)
-        html_content = html_content.replace("{{ database.status }}", "✅ Connected")
-        html_content = html_content.replace("{{ llm.service }}", "Ollama")
-        html_content = html_content.replace("{{ llm.model }}", settings.ollama_model)
-        
+        # Replace template variables in a single pass over the template
+        values = {
+            "version": settings.version,
+            "status": "🟢 Operational",
+            "description": "Gamified outdoor adventure platform with AI-powered storytelling",
+            "statistics.total_users": str(stats.get("total_users", 0)),
+            "statistics.total_routes": str(stats.get("total_routes", 0)),
+            "statistics.total_xp_earned": str(stats.get("total_xp_earned", 0)),
+            "statistics.average_level": str(stats.get("average_level", 0.0)),
+            "database.type": db_type,
+            "database.status": "✅ Connected",
+            "llm.service": "Ollama",
+            "llm.model": settings.ollama_model,
+        }
+        html_content = _TEMPLATE_VARIABLE_RE.sub(
+            lambda match: values.get(match.group(1), match.group(0)), html_content
+        )
+
         return HTMLResponse(content=html_content)
 
     @app.get("/healthz", tags=["health"])
@@ -164,11 +265,11 @@ def create_app() -> FastAPI:
                     # New messages available, send them
                     new_messages = list(_llm_messages)[last_count:]
                     for message in new_messages:
-                        yield f"data: {message.to_json()}\n\n"
+                        yield f"data: {message.to_json()}\n\n".encode()
                     last_count = current_count
                 else:
                     # Send heartbeat to keep connection alive
-                    yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': datetime.now().isoformat()})}\n\n"
+                    yield _heartbeat_event()
                 
                 await asyncio.sleep(0.5)  # Check every 500ms
         
@@ -187,11 +288,13 @@ def create_app() -> FastAPI:
         """Get recent LLM messages."""
         return {"messages": get_recent_messages(limit)}
 
-    app.include_router(profiles.router, prefix="/api")
-    app.include_router(routes.router, prefix="/api")
-    app.include_router(souvenirs.router, prefix="/api")
-    app.include_router(achievements.router, prefix="/api")
-    app.include_router(logs.router, prefix="/api")
+    @app.get("/api/llm-metrics", tags=["monitoring"])
+    async def llm_metrics():
+        """Get Ollama token/latency statistics and response cache counters."""
+        return get_llm_metrics()
+
+    for api_module in (profiles, routes, souvenirs, achievements, logs):
+        app.include_router(api_module.router, prefix="/api")
 
     return app
 
@@ -3,15 +3,22 @@ Domain database models for the hiking simulator backend.
 """
 from __future__ import annotations
 
+import json
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, func, text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, reconstructor, relationship
 
 from .base import Base
 
 
+# JSON document column: native JSONB on PostgreSQL, JSON-encoded TEXT on SQLite.
+# Values are (de)serialized by the driver, so callers work with dicts/lists directly.
+JSONDocument = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+
 class DemoProfile(Base):
     """
     Temporary player profile captured after the US-03 questionnaire.
@@ -22,22 +29,29 @@ class DemoProfile(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     total_xp: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
     level: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("1"))
-    user_vector_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    user_vector_json: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONDocument, nullable=True)
     genai_welcome_summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    unlocked_routes_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    unlocked_routes_json: Mapped[Optional[list[Any]]] = mapped_column(JSONDocument, nullable=True)
+    # Completion counters maintained on souvenir creation (read by achievement checks)
+    souvenir_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    total_distance_m: Mapped[float] = mapped_column(Float, nullable=False, server_default=text("0"))
+    completed_types_json: Mapped[Optional[list[Any]]] = mapped_column(JSONDocument, nullable=True)
 
     souvenirs: Mapped[List["Souvenir"]] = relationship(
         "Souvenir",
+        lazy="raise_on_sql",
         back_populates="demo_profile",
         cascade="all, delete-orphan",
     )
     feedback_entries: Mapped[List["ProfileFeedback"]] = relationship(
         "ProfileFeedback",
+        lazy="raise_on_sql",
         back_populates="demo_profile",
         cascade="all, delete-orphan",
     )
     achievements: Mapped[List["ProfileAchievement"]] = relationship(
         "ProfileAchievement",
+        lazy="raise_on_sql",
         back_populates="demo_profile",
         cascade="all, delete-orphan",
     )
@@ -52,6 +66,10 @@ class Route(Base):
     """
 
     __tablename__ = "routes"
+    __table_args__ = (
+        # GIN index for tag containment filters; only meaningful on PostgreSQL JSONB
+        Index("ix_routes_tags_gin", "tags_json", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -60,29 +78,33 @@ class Route(Base):
     duration_min: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     difficulty: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     short_description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    tags_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    tags_json: Mapped[Optional[list[Any]]] = mapped_column(JSONDocument, nullable=True)
     location: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     elevation: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    gpx_data_raw: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Large text payloads are deferred; load them with undefer_group("payload")
+    gpx_data_raw: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group="payload", deferred_raiseload=True)
     xp_required: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
     base_xp_reward: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
     story_prologue_title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    story_prologue_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    story_epilogue_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    story_prologue_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group="payload", deferred_raiseload=True)
+    story_epilogue_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group="payload", deferred_raiseload=True)
 
     breakpoints: Mapped[List["Breakpoint"]] = relationship(
         "Breakpoint",
+        lazy="raise_on_sql",
         back_populates="route",
         cascade="all, delete-orphan",
         order_by="Breakpoint.order_index",
     )
     souvenirs: Mapped[List["Souvenir"]] = relationship(
         "Souvenir",
+        lazy="raise_on_sql",
         back_populates="route",
         cascade="all, delete-orphan",
     )
     feedback_entries: Mapped[List["ProfileFeedback"]] = relationship(
         "ProfileFeedback",
+        lazy="raise_on_sql",
         back_populates="route",
         cascade="all, delete-orphan",
     )
@@ -102,6 +124,7 @@ class Breakpoint(Base):
     route_id: Mapped[int] = mapped_column(
         ForeignKey("routes.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
     order_index: Mapped[int] = mapped_column(Integer, nullable=False)
     poi_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
@@ -110,9 +133,10 @@ class Breakpoint(Base):
     longitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     main_quest_snippet: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
-    route: Mapped["Route"] = relationship("Route", back_populates="breakpoints")
+    route: Mapped["Route"] = relationship("Route", back_populates="breakpoints", lazy="raise_on_sql")
     mini_quests: Mapped[List["MiniQuest"]] = relationship(
         "MiniQuest",
+        lazy="raise_on_sql",
         back_populates="breakpoint",
         cascade="all, delete-orphan",
         order_by="MiniQuest.id",
@@ -133,11 +157,12 @@ class MiniQuest(Base):
     breakpoint_id: Mapped[int] = mapped_column(
         ForeignKey("breakpoints.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
     task_description: Mapped[str] = mapped_column(Text, nullable=False)
     xp_reward: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
 
-    breakpoint: Mapped["Breakpoint"] = relationship("Breakpoint", back_populates="mini_quests")
+    breakpoint: Mapped["Breakpoint"] = relationship("Breakpoint", back_populates="mini_quests", lazy="raise_on_sql")
 
     def __repr__(self) -> str:  # pragma: no cover - debugging helper
         return f"<MiniQuest id={self.id} breakpoint_id={self.breakpoint_id}>"
@@ -149,6 +174,10 @@ class Souvenir(Base):
     """
 
     __tablename__ = "souvenirs"
+    __table_args__ = (
+        # Per-profile history ordered by completion time
+        Index("ix_souvenirs_profile_completed", "demo_profile_id", "completed_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     demo_profile_id: Mapped[int] = mapped_column(
@@ -158,6 +187,7 @@ class Souvenir(Base):
     route_id: Mapped[int] = mapped_column(
         ForeignKey("routes.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
     completed_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -165,12 +195,13 @@ class Souvenir(Base):
         server_default=func.now(),
     )
     total_xp_gained: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
-    genai_summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    xp_breakdown_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    pixel_image_svg: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # LLM-generated pixel art SVG
+    # Deferred like Route's payload columns; load with undefer_group("payload")
+    genai_summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group="payload", deferred_raiseload=True)
+    xp_breakdown_json: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONDocument, nullable=True)
+    pixel_image_svg: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group="payload", deferred_raiseload=True)  # LLM-generated pixel art SVG
 
-    demo_profile: Mapped["DemoProfile"] = relationship("DemoProfile", back_populates="souvenirs")
-    route: Mapped["Route"] = relationship("Route", back_populates="souvenirs")
+    demo_profile: Mapped["DemoProfile"] = relationship("DemoProfile", back_populates="souvenirs", lazy="raise_on_sql")
+    route: Mapped["Route"] = relationship("Route", back_populates="souvenirs", lazy="raise_on_sql")
 
     def __repr__(self) -> str:  # pragma: no cover - debugging helper
         return f"<Souvenir id={self.id} profile_id={self.demo_profile_id} route_id={self.route_id}>"
@@ -182,6 +213,10 @@ class ProfileFeedback(Base):
     """
 
     __tablename__ = "profile_feedback"
+    __table_args__ = (
+        # Per-profile feedback lookups used by the re-ranker
+        Index("ix_profile_feedback_profile_route", "demo_profile_id", "route_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     demo_profile_id: Mapped[int] = mapped_column(
@@ -194,8 +229,8 @@ class ProfileFeedback(Base):
     )
     reason: Mapped[str] = mapped_column(String(100), nullable=False)
 
-    demo_profile: Mapped["DemoProfile"] = relationship("DemoProfile", back_populates="feedback_entries")
-    route: Mapped["Route"] = relationship("Route", back_populates="feedback_entries")
+    demo_profile: Mapped["DemoProfile"] = relationship("DemoProfile", back_populates="feedback_entries", lazy="raise_on_sql")
+    route: Mapped["Route"] = relationship("Route", back_populates="feedback_entries", lazy="raise_on_sql")
 
     def __repr__(self) -> str:  # pragma: no cover - debugging helper
         return f"<ProfileFeedback id={self.id} reason={self.reason!r}>"
@@ -214,14 +249,24 @@ class Achievement(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     icon: Mapped[str] = mapped_column(String(10), nullable=False)
     condition_type: Mapped[str] = mapped_column(String(20), nullable=False)  # route_count, route_type, level, xp, distance
-    condition_value: Mapped[str] = mapped_column(Text, nullable=False)  # JSON string
+    condition_value: Mapped[dict[str, Any]] = mapped_column(JSONDocument, nullable=False)
+    # Queryable copies of condition_value: numeric threshold, or route type for route_type
+    condition_threshold: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    condition_target: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
 
     profile_achievements: Mapped[List["ProfileAchievement"]] = relationship(
         "ProfileAchievement",
+        lazy="raise_on_sql",
         back_populates="achievement",
         cascade="all, delete-orphan",
     )
 
+    @reconstructor
+    def _init_on_load(self) -> None:
+        # The API returns condition_value as a JSON string; serialize it once per
+        # loaded definition instead of on every response.
+        self.condition_value_json = json.dumps(self.condition_value)
+
     def __repr__(self) -> str:  # pragma: no cover - debugging helper
         return f"<Achievement id={self.id} key={self.achievement_key!r}>"
 
@@ -232,6 +277,17 @@ class ProfileAchievement(Base):
     """
 
     __tablename__ = "profile_achievements"
+    __table_args__ = (
+        # One unlock per achievement; also serves per-profile lookups
+        UniqueConstraint("demo_profile_id", "achievement_id", name="uq_profile_achievements_profile_achievement"),
+        # Covering index for per-profile unlock listings (index-only scans on PostgreSQL;
+        # other dialects rely on the unique constraint above)
+        Index(
+            "ix_profile_achievements_profile_cover",
+            "demo_profile_id",
+            postgresql_include=["achievement_id", "unlocked_at"],
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     demo_profile_id: Mapped[int] = mapped_column(
@@ -241,6 +297,7 @@ class ProfileAchievement(Base):
     achievement_id: Mapped[int] = mapped_column(
         ForeignKey("achievements.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
     unlocked_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -248,8 +305,8 @@ class ProfileAchievement(Base):
         server_default=func.now(),
     )
 
-    demo_profile: Mapped["DemoProfile"] = relationship("DemoProfile", back_populates="achievements")
-    achievement: Mapped["Achievement"] = relationship("Achievement", back_populates="profile_achievements")
+    demo_profile: Mapped["DemoProfile"] = relationship("DemoProfile", back_populates="achievements", lazy="raise_on_sql")
+    achievement: Mapped["Achievement"] = relationship("Achievement", back_populates="profile_achievements", lazy="raise_on_sql")
 
     def __repr__(self) -> str:  # pragma: no cover - debugging helper
         return f"<ProfileAchievement id={self.id} profile_id={self.demo_profile_id} achievement_id={self.achievement_id}>"
@@ -3,23 +3,37 @@ Achievement service for checking and unlocking user achievements.
 """
 from __future__ import annotations
 
-import json
-from typing import List, Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
 
-from sqlalchemy import select, func
+from sqlalchemy import ColumnElement, Row, and_, literal, or_, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.database import dialect_insert
 from app.models.entities import (
     Achievement,
     ProfileAchievement,
     DemoProfile,
-    Souvenir,
     Route,
 )
 
+# Achievement definitions are static seed data, so they are loaded once per
+# process. seed_achievements() resets the cache whenever it inserts new definitions.
+_ACHIEVEMENT_CACHE: Optional[list[Achievement]] = None
 
-async def get_all_achievements(db: AsyncSession) -> List[Achievement]:
+# condition_value key holding the numeric threshold for each condition type,
+# with the threshold used when the key is missing
+_CONDITION_THRESHOLDS = {
+    "route_count": ("count", 1),
+    "level": ("level", 5),
+    "xp": ("xp", 1000),
+    "distance": ("distance_km", 50),
+}
+
+
+async def get_all_achievements(db: AsyncSession) -> list[Achievement]:
     """
     Get all achievement definitions.
     """
@@ -27,9 +41,27 @@ async def get_all_achievements(db: AsyncSession) -> List[Achievement]:
     return list(result.scalars().all())
 
 
+async def get_cached_achievements(db: AsyncSession) -> list[Achievement]:
+    """
+    Get all achievement definitions, ordered by id.
+
+    The first call loads the definitions from the database; later calls are
+    served from the in-process cache. The cached objects are expunged from the
+    loading session, so a rollback or close of that request's session cannot
+    expire or detach them underneath later requests.
+    """
+    global _ACHIEVEMENT_CACHE
+    if _ACHIEVEMENT_CACHE is None:
+        achievements = await get_all_achievements(db)
+        for achievement in achievements:
+            db.expunge(achievement)
+        _ACHIEVEMENT_CACHE = achievements
+    return _ACHIEVEMENT_CACHE
+
+
 async def get_user_achievements(
     profile_id: int, db: AsyncSession
-) -> List[ProfileAchievement]:
+) -> list[ProfileAchievement]:
     """
     Get all achievements unlocked by a user.
     """
@@ -41,60 +73,64 @@ async def get_user_achievements(
     return list(result.scalars().all())
 
 
-async def check_achievement_condition(
-    achievement: Achievement,
-    profile: DemoProfile,
-    completed_routes: List[Route],
-    db: AsyncSession,
-) -> bool:
+async def get_unlock_times(profile_id: int, db: AsyncSession) -> dict[int, datetime]:
     """
-    Check if a user meets the condition for an achievement.
-    
-    Args:
-        achievement: The achievement to check
-        profile: User profile
-        completed_routes: List of completed routes (with route data)
-        db: Database session
-    
+    Get the unlock time of every achievement unlocked by a user.
+
+    Only ``achievement_id`` and ``unlocked_at`` are selected, so PostgreSQL can
+    answer from the covering index without touching the table.
+
     Returns:
-        True if condition is met, False otherwise
+        Mapping of achievement id to unlock time
     """
-    condition_type = achievement.condition_type
-    condition_value = json.loads(achievement.condition_value)
+    result = await db.execute(
+        select(ProfileAchievement.achievement_id, ProfileAchievement.unlocked_at)
+        .where(ProfileAchievement.demo_profile_id == profile_id)
+    )
+    return dict(result.tuples().all())
 
-    if condition_type == "route_count":
-        required_count = condition_value.get("count", 1)
-        return len(completed_routes) >= required_count
 
-    elif condition_type == "route_type":
-        required_type = condition_value.get("type")  # hiking, running, cycling
-        return any(
-            _map_category_to_type(route.category_name) == required_type
-            for route in completed_routes
-        )
+def _condition_met_clause(profile: Row) -> ColumnElement[bool]:
+    """
+    Build a SQL condition matching the achievements a profile qualifies for.
 
-    elif condition_type == "level":
-        required_level = condition_value.get("level", 5)
-        return profile.level >= required_level
+    Args:
+        profile: Row with the profile's level, XP and completion counters
 
-    elif condition_type == "xp":
-        required_xp = condition_value.get("xp", 1000)
-        return profile.total_xp >= required_xp
+    Returns:
+        Boolean clause over the ``achievements`` table
+    """
+    condition_type = Achievement.condition_type
+    threshold = Achievement.condition_threshold
+    return or_(
+        and_(condition_type == "route_count", threshold <= profile.souvenir_count),
+        and_(
+            condition_type == "route_type",
+            Achievement.condition_target.in_(profile.completed_types_json or []),
+        ),
+        and_(condition_type == "level", threshold <= profile.level),
+        and_(condition_type == "xp", threshold <= profile.total_xp),
+        and_(condition_type == "distance", threshold * 1000 <= profile.total_distance_m),
+    )
 
-    elif condition_type == "distance":
-        required_distance_km = condition_value.get("distance_km", 50)
-        total_distance_m = sum(
-            route.length_meters or 0 for route in completed_routes
-        )
-        total_distance_km = total_distance_m / 1000.0
-        return total_distance_km >= required_distance_km
 
-    return False
+def _condition_columns(condition_type: str, condition: dict[str, Any]) -> dict[str, Any]:
+    """
+    Split a condition_value document into the queryable threshold/target columns.
+    """
+    threshold = _CONDITION_THRESHOLDS.get(condition_type)
+    return {
+        "condition_threshold": condition.get(*threshold) if threshold else None,
+        "condition_target": condition.get("type") if condition_type == "route_type" else None,
+    }
 
 
+@lru_cache(maxsize=1024)
 def _map_category_to_type(category_name: Optional[str]) -> Optional[str]:
     """
     Map backend category_name to frontend route type.
+
+    Memoized: there are only a handful of distinct category names.
     """
     if not category_name:
         return None
@@ -107,149 +143,155 @@ def _map_category_to_type(category_name: Optional[str]) -> Optional[str]:
     return "hiking"  # Default to hiking
 
 
+def record_completed_route(profile: DemoProfile, route: Route) -> None:
+    """
+    Update the profile's completion counters for a newly completed route.
+    """
+    profile.souvenir_count += 1
+    profile.total_distance_m += route.length_meters or 0
+
+    route_type = _map_category_to_type(route.category_name)
+    completed_types = profile.completed_types_json or []
+    if route_type and route_type not in completed_types:
+        # Assign a new list so the JSON column change is detected
+        profile.completed_types_json = sorted([*completed_types, route_type])
+
+
 async def check_and_unlock_achievements(
     profile_id: int, db: AsyncSession
-) -> List[Achievement]:
+) -> list[Achievement]:
     """
     Check all achievements and unlock any that the user qualifies for.
     
     Returns:
         List of newly unlocked achievements
     """
-    # Get user profile
-    profile = await db.get(DemoProfile, profile_id)
+    # Get the profile's level, XP and completion counters
+    profile_result = await db.execute(
+        select(
+            DemoProfile.level,
+            DemoProfile.total_xp,
+            DemoProfile.souvenir_count,
+            DemoProfile.total_distance_m,
+            DemoProfile.completed_types_json,
+        ).where(DemoProfile.id == profile_id)
+    )
+    profile = profile_result.one_or_none()
     if not profile:
         return []
 
-    # Get all achievements
-    all_achievements = await get_all_achievements(db)
-
-    # Get user's already unlocked achievements
-    unlocked_result = await db.execute(
-        select(ProfileAchievement.achievement_id).where(
-            ProfileAchievement.demo_profile_id == profile_id
-        )
+    # Achievements the profile qualifies for, evaluated by the database
+    qualified = select(literal(profile_id), Achievement.id).where(
+        _condition_met_clause(profile)
     )
-    unlocked_achievement_ids = set(unlocked_result.scalars().all())
 
-    # Get user's completed routes
-    souvenirs_result = await db.execute(
-        select(Souvenir)
-        .where(Souvenir.demo_profile_id == profile_id)
-        .options(selectinload(Souvenir.route))
+    # Unlock them all with a single INSERT ... SELECT; already unlocked ones hit
+    # the unique constraint and are skipped, so RETURNING yields only new unlocks
+    result = await db.execute(
+        dialect_insert(db)(ProfileAchievement)
+        .from_select(["demo_profile_id", "achievement_id"], qualified)
+        .on_conflict_do_nothing(index_elements=["demo_profile_id", "achievement_id"])
+        .returning(ProfileAchievement.achievement_id)
     )
-    souvenirs = list(souvenirs_result.scalars().all())
-    completed_routes = [souvenir.route for souvenir in souvenirs if souvenir.route]
-
-    # Check each achievement
-    newly_unlocked: List[Achievement] = []
-
-    for achievement in all_achievements:
-        # Skip if already unlocked
-        if achievement.id in unlocked_achievement_ids:
-            continue
-
-        # Check condition
-        if await check_achievement_condition(
-            achievement, profile, completed_routes, db
-        ):
-            # Unlock achievement
-            profile_achievement = ProfileAchievement(
-                demo_profile_id=profile_id,
-                achievement_id=achievement.id,
-            )
-            db.add(profile_achievement)
-            newly_unlocked.append(achievement)
-
-    if newly_unlocked:
-        await db.commit()
+    unlocked_ids = set(result.scalars().all())
+    if not unlocked_ids:
+        return []
+    await db.commit()
 
-    return newly_unlocked
+    all_achievements = await get_cached_achievements(db)
+    return [achievement for achievement in all_achievements if achievement.id in unlocked_ids]
+
+
+# Default achievement definitions
+_ACHIEVEMENTS_DATA = [
+    {
+        "achievement_key": "first-steps",
+        "name": "First Steps",
+        "description": "Complete your first route",
+        "icon": "🥾",
+        "condition_type": "route_count",
+        "condition_value": {"count": 1},
+    },
+    {
+        "achievement_key": "explorer",
+        "name": "Explorer",
+        "description": "Complete 3 different routes",
+        "icon": "🗺️",
+        "condition_type": "route_count",
+        "condition_value": {"count": 3},
+    },
+    {
+        "achievement_key": "hiker",
+        "name": "Trail Hiker",
+        "description": "Complete a hiking route",
+        "icon": "⛰️",
+        "condition_type": "route_type",
+        "condition_value": {"type": "hiking"},
+    },
+    {
+        "achievement_key": "runner",
+        "name": "Trail Runner",
+        "description": "Complete a running route",
+        "icon": "🏃",
+        "condition_type": "route_type",
+        "condition_value": {"type": "running"},
+    },
+    {
+        "achievement_key": "cyclist",
+        "name": "Cyclist",
+        "description": "Complete a cycling route",
+        "icon": "🚴",
+        "condition_type": "route_type",
+        "condition_value": {"type": "cycling"},
+    },
+    {
+        "achievement_key": "level-5",
+        "name": "Rising Star",
+        "description": "Reach Level 5",
+        "icon": "⭐",
+        "condition_type": "level",
+        "condition_value": {"level": 5},
+    },
+    {
+        "achievement_key": "xp-1000",
+        "name": "XP Collector",
+        "description": "Earn 1000 total XP",
+        "icon": "💎",
+        "condition_type": "xp",
+        "condition_value": {"xp": 1000},
+    },
+    {
+        "achievement_key": "distance-50",
+        "name": "Long Distance",
+        "description": "Travel 50km total",
+        "icon": "🎯",
+        "condition_type": "distance",
+        "condition_value": {"distance_km": 50},
+    },
+]
+
+# Seed rows with the queryable condition columns split out, built once at import
+_ACHIEVEMENT_ROWS = [
+    {**data, **_condition_columns(data["condition_type"], data["condition_value"])}
+    for data in _ACHIEVEMENTS_DATA
+]
 
 
 async def seed_achievements(db: AsyncSession) -> None:
     """
     Seed the database with default achievements.
     """
-    achievements_data = [
-        {
-            "achievement_key": "first-steps",
-            "name": "First Steps",
-            "description": "Complete your first route",
-            "icon": "🥾",
-            "condition_type": "route_count",
-            "condition_value": json.dumps({"count": 1}),
-        },
-        {
-            "achievement_key": "explorer",
-            "name": "Explorer",
-            "description": "Complete 3 different routes",
-            "icon": "🗺️",
-            "condition_type": "route_count",
-            "condition_value": json.dumps({"count": 3}),
-        },
-        {
-            "achievement_key": "hiker",
-            "name": "Trail Hiker",
-            "description": "Complete a hiking route",
-            "icon": "⛰️",
-            "condition_type": "route_type",
-            "condition_value": json.dumps({"type": "hiking"}),
-        },
-        {
-            "achievement_key": "runner",
-            "name": "Trail Runner",
-            "description": "Complete a running route",
-            "icon": "🏃",
-            "condition_type": "route_type",
-            "condition_value": json.dumps({"type": "running"}),
-        },
-        {
-            "achievement_key": "cyclist",
-            "name": "Cyclist",
-            "description": "Complete a cycling route",
-            "icon": "🚴",
-            "condition_type": "route_type",
-            "condition_value": json.dumps({"type": "cycling"}),
-        },
-        {
-            "achievement_key": "level-5",
-            "name": "Rising Star",
-            "description": "Reach Level 5",
-            "icon": "⭐",
-            "condition_type": "level",
-            "condition_value": json.dumps({"level": 5}),
-        },
-        {
-            "achievement_key": "xp-1000",
-            "name": "XP Collector",
-            "description": "Earn 1000 total XP",
-            "icon": "💎",
-            "condition_type": "xp",
-            "condition_value": json.dumps({"xp": 1000}),
-        },
-        {
-            "achievement_key": "distance-50",
-            "name": "Long Distance",
-            "description": "Travel 50km total",
-            "icon": "🎯",
-            "condition_type": "distance",
-            "condition_value": json.dumps({"distance_km": 50}),
-        },
-    ]
-
-    for data in achievements_data:
-        # Check if achievement already exists
-        result = await db.execute(
-            select(Achievement).where(
-                Achievement.achievement_key == data["achievement_key"]
-            )
-        )
-        existing = result.scalar_one_or_none()
-
-        if not existing:
-            achievement = Achievement(**data)
-            db.add(achievement)
+    global _ACHIEVEMENT_CACHE
 
+    # Insert all definitions in one idempotent statement; existing keys are skipped
+    result = await db.execute(
+        dialect_insert(db)(Achievement)
+        .values(_ACHIEVEMENT_ROWS)
+        .on_conflict_do_nothing(index_elements=["achievement_key"])
+        .returning(Achievement.id)
+    )
+    inserted_ids = result.scalars().all()
     await db.commit()
 
+    if inserted_ids:
+        _ACHIEVEMENT_CACHE = None
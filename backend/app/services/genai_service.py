@@ -14,18 +14,378 @@ All prompts use Llama3.1 chat template format with proper prompt engineering:
 - Explicit length constraints
 - Structured output where needed
 """
+import asyncio
+import hashlib
+import re
+import sys
 import httpx
+import orjson
+import sqlite3
+import threading
 import time
-from typing import Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Final, Optional, Union
 from datetime import datetime
 from fastapi import HTTPException
 
 from app.api.schemas import ProfileCreate
 from app.settings import get_settings
 from app.logger import get_logger, log_api_call
+from app.llm_logger import increment_llm_counter, log_llm_output, observe_llm_value
+from app.services.svg_templates import generate_souvenir_svg
 
 logger = get_logger(__name__)
 
+# Settings are fixed for the life of the process, so resolve them once
+# instead of on every Ollama call
+settings = get_settings()
+
+# Shared Ollama client so keep-alive connections are reused across calls
+_client: Optional[httpx.AsyncClient] = None
+
+# Bounds in-flight Ollama requests; extra callers wait here instead of
+# piling up inside the Ollama server queue. Ollama has no multi-prompt
+# generate endpoint: it batches concurrent requests into its
+# OLLAMA_NUM_PARALLEL decode slots itself, so letting up to this many
+# requests through at once is what gives batched decoding during bursts.
+_ollama_semaphore: Optional[asyncio.Semaphore] = None
+
+# Circuit breaker: consecutive Ollama failures, and the monotonic time until
+# which calls fail fast so callers fall back instead of waiting for a timeout
+_breaker_failures = 0
+_breaker_open_until = 0.0
+
+
+class OllamaStreamError(ValueError):
+    """
+    Server-side failure reported by Ollama in an ``{"error": ...}`` stream chunk.
+    """
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """
+    Return the shared Ollama HTTP client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=settings.ollama_timeout,
+            # Multiplexes concurrent generations over one connection when a
+            # TLS proxy in front of Ollama negotiates h2
+            http2=settings.ollama_http2,
+            # Ollama traffic is bursty; keep idle connections for minutes rather
+            # than httpx's 5s default so the next request skips the connect
+            limits=httpx.Limits(
+                max_connections=64,
+                max_keepalive_connections=32,
+                keepalive_expiry=300.0,
+            ),
+        )
+    return _client
+
+
+# Generated responses keyed by a hash of model, options and prompt.
+# Values are (expires_at, text); insertion order doubles as LRU order.
+# All access happens on the event loop without awaiting, so no lock is needed.
+_RESPONSE_CACHE: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+# Persistent layer under _RESPONSE_CACHE so generated text survives restarts.
+# The file may be shared by several worker processes, so a lookup can wait on
+# another writer's lock: all disk access runs in a worker thread, serialized
+# by _disk_cache_lock, and gives up after _DISK_CACHE_TIMEOUT seconds.
+_disk_cache: Optional[sqlite3.Connection] = None
+_disk_cache_unavailable = False
+_disk_cache_lock = threading.Lock()
+_DISK_CACHE_TIMEOUT: Final = 0.25
+
+class _InflightRequest:
+    """
+    A shared in-flight generation and the number of callers awaiting it.
+    """
+    __slots__ = ("key", "future", "waiters")
+
+    def __init__(self, key: str, future: asyncio.Future) -> None:
+        self.key = key
+        self.future = future
+        self.waiters = 0
+
+
+# In-flight Ollama calls keyed like the response cache; concurrent identical
+# requests await the same task instead of each calling the model
+_INFLIGHT_REQUESTS: dict[str, _InflightRequest] = {}
+
+# Console/UI logging tasks running off the request path; referenced here so
+# they are not garbage collected before they finish
+_LOG_TASKS: set[asyncio.Task] = set()
+
+# Sampling this random is meant to vary between calls, so it is never cached
+# or shared between callers
+_MAX_CACHEABLE_TEMPERATURE = 0.9
+
+# Welcome summaries depend only on the questionnaire answers
+WELCOME_CACHE_TTL = 24 * 3600
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _parse_keep_alive(value: str) -> Union[str, int]:
+    """
+    Convert ``OLLAMA_KEEP_ALIVE`` to the form Ollama accepts.
+    
+    Ollama reads a JSON string as a Go duration, which needs a unit ("60m"),
+    and a JSON number as seconds; a bare "-1" or "3600" must therefore be
+    sent as a number.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+# keep_alive sent with every request; negative keeps the model loaded indefinitely
+_KEEP_ALIVE = _parse_keep_alive(settings.ollama_keep_alive)
+
+
+@lru_cache(maxsize=64)
+def _request_body_head(
+    model: str, max_tokens: int, temperature: float, num_keep: int, stop: Optional[tuple[str, ...]]
+) -> bytes:
+    """
+    Pre-encoded JSON for everything in a generate request except the prompt.
+    """
+    fields = {
+        "model": model,
+        "stream": True,
+        "keep_alive": _KEEP_ALIVE,
+        "options": {
+            "temperature": temperature,
+            "num_predict": max_tokens,
+            "num_ctx": settings.ollama_num_ctx,
+        },
+    }
+    if num_keep:
+        fields["options"]["num_keep"] = num_keep
+    if stop:
+        fields["options"]["stop"] = list(stop)
+    # Drop the closing brace so the prompt can be appended as the last field
+    return orjson.dumps(fields)[:-1] + b',"prompt":'
+
+
+def _build_request_body(
+    prompt: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    num_keep: int,
+    stop: Optional[tuple[str, ...]],
+) -> bytes:
+    """
+    Build the ``/api/generate`` JSON body, serializing only the prompt per call.
+    """
+    return _request_body_head(model, max_tokens, temperature, num_keep, stop) + orjson.dumps(prompt) + b"}"
+
+
+def _response_cache_key(
+    prompt: str, model: str, max_tokens: int, temperature: float, stop: Optional[tuple[str, ...]]
+) -> str:
+    """
+    Build the response cache key for a generation request.
+    """
+    raw = f"{model}|{temperature}|{max_tokens}|{stop}|{prompt}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _get_disk_cache() -> Optional[sqlite3.Connection]:
+    """
+    Return the persistent response cache, opening it on first use.
+    
+    Blocking; call from a worker thread with ``_disk_cache_lock`` held.
+    Returns None if persistence is disabled or the cache file cannot be opened.
+    """
+    global _disk_cache, _disk_cache_unavailable
+    if _disk_cache is None and settings.response_cache_persist and not _disk_cache_unavailable:
+        try:
+            conn = sqlite3.connect(
+                settings.response_cache_path,
+                timeout=_DISK_CACHE_TIMEOUT,
+                check_same_thread=False,
+            )
+            # Losing the last writes on a crash only costs a regeneration
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, text TEXT NOT NULL)"
+            )
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+            _disk_cache = conn
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Persistent response cache unavailable: {e}")
+            _disk_cache_unavailable = True
+    return _disk_cache
+
+
+def _disk_cache_usable() -> bool:
+    """
+    Whether a persistent cache lookup or store is worth a thread hop.
+    """
+    return settings.response_cache_persist and not _disk_cache_unavailable
+
+
+def _read_disk_cache(key: str) -> Optional[tuple[float, str]]:
+    """
+    Read ``(expires_at, text)`` for a key from the persistent cache (blocking).
+    """
+    with _disk_cache_lock:
+        disk_cache = _get_disk_cache()
+        if disk_cache is None:
+            return None
+        try:
+            return disk_cache.execute(
+                "SELECT expires_at, text FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Persistent response cache read failed: {e}")
+            return None
+
+
+def _write_disk_cache(key: str, text: str, expires_at: float) -> None:
+    """
+    Write a response to the persistent cache (blocking).
+    """
+    with _disk_cache_lock:
+        disk_cache = _get_disk_cache()
+        if disk_cache is None:
+            return
+        try:
+            disk_cache.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, text) VALUES (?, ?, ?)",
+                (key, expires_at, text),
+            )
+            disk_cache.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Persistent response cache write failed: {e}")
+
+
+def _remember_response(key: str, text: str, ttl: float) -> None:
+    """
+    Store a response in memory, evicting the least recently used entries beyond the limit.
+    """
+    _RESPONSE_CACHE[key] = (time.monotonic() + ttl, text)
+    _RESPONSE_CACHE.move_to_end(key)
+    max_entries = settings.response_cache_max_entries
+    while len(_RESPONSE_CACHE) > max_entries:
+        _RESPONSE_CACHE.popitem(last=False)
+
+
+async def _get_cached_response(key: str) -> Optional[str]:
+    """
+    Return a cached response if present and not expired.
+    
+    Looks in memory first, then in the persistent cache (off the event loop);
+    disk hits are copied into memory for their remaining lifetime.
+    """
+    entry = _RESPONSE_CACHE.get(key)
+    if entry is not None:
+        expires_at, text = entry
+        if expires_at > time.monotonic():
+            _RESPONSE_CACHE.move_to_end(key)
+            return text
+        del _RESPONSE_CACHE[key]
+    
+    if not _disk_cache_usable():
+        return None
+    row = await asyncio.to_thread(_read_disk_cache, key)
+    if row is None:
+        return None
+    expires_at, text = row
+    remaining = expires_at - time.time()
+    if remaining <= 0:
+        return None
+    _remember_response(key, text, remaining)
+    return text
+
+
+async def _store_cached_response(key: str, text: str, ttl: float) -> None:
+    """
+    Store a response in memory and in the persistent cache (off the event loop).
+    """
+    _remember_response(key, text, ttl)
+    if _disk_cache_usable():
+        await asyncio.to_thread(_write_disk_cache, key, text, time.time() + ttl)
+
+
+def close_response_cache() -> None:
+    """
+    Close the persistent response cache.
+    """
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is not None:
+            _disk_cache.close()
+            _disk_cache = None
+
+
+def _get_ollama_semaphore() -> asyncio.Semaphore:
+    """
+    Return the semaphore limiting concurrent Ollama requests.
+    """
+    global _ollama_semaphore
+    if _ollama_semaphore is None:
+        _ollama_semaphore = asyncio.Semaphore(settings.ollama_max_concurrency)
+    return _ollama_semaphore
+
+
+def _check_ollama_breaker() -> None:
+    """
+    Fail fast while the circuit breaker is open.
+    
+    Raises:
+        HTTPException: 503 if recent Ollama calls kept failing
+    """
+    remaining = _breaker_open_until - time.monotonic()
+    if remaining > 0:
+        _count_llm_event("ollama_breaker_rejections")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Ollama unavailable, retrying in {remaining:.0f}s"
+        )
+
+
+def _record_ollama_outcome(ok: bool) -> None:
+    """
+    Update the circuit breaker after an Ollama call.
+    
+    A success closes the breaker; reaching ``settings.ollama_breaker_threshold``
+    consecutive failures opens it for ``settings.ollama_breaker_cooldown``
+    seconds. A failure right after the cooldown opens it again.
+    """
+    global _breaker_failures, _breaker_open_until
+    if ok:
+        _breaker_failures = 0
+        return
+    _breaker_failures += 1
+    threshold = settings.ollama_breaker_threshold
+    if threshold and _breaker_failures >= threshold:
+        _breaker_open_until = time.monotonic() + settings.ollama_breaker_cooldown
+        logger.warning(
+            f"⚠️ Ollama failed {_breaker_failures} times in a row; "
+            f"failing fast for {settings.ollama_breaker_cooldown}s"
+        )
+
+
+async def close_ollama_client() -> None:
+    """
+    Close the shared Ollama HTTP client and its pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 # Narrative style → LLM prompt style descriptors
 # These detailed instructions ensure the LLM produces consistent, style-appropriate output
@@ -54,19 +414,199 @@ NARRATIVE_STYLE_PROMPTS = {
     ),
 }
 
+# Line break plus any markdown emphasis/heading markers around it
+_MARKDOWN_LINE_BREAK = re.compile(r"[ \t*#]*\n[\s*#]*")
+
+# Static part of the welcome summary prompt (system block + few-shot examples).
+# Kept byte-identical across calls so Ollama can reuse the cached prefix.
+WELCOME_PROMPT_PREFIX: Final[str] = """<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+    
+You are the TrailSaga – Hogwarts Expedition Series AI Guide. Generate a personalized, engaging welcome message for a new user.
+
+Guidelines:
+- Length: 80-100 words
+- Tone: Warm, encouraging, and adventurous
+- Focus on: fitness level, adventure preferences, narrative style
+- Do NOT: invent character names, describe physical appearance, use generic phrases
+- Start with a creative explorer title that matches their profile
+- Format: plain text in a single paragraph, no markdown, headings or bold
+
+Write in the narrative style given with the new user's profile.
+
+Output only the welcome message, no additional text.<|eot_id|><|start_header_id|>user<|end_header_id|>
+
+Profile:
+- Fitness: Beginner
+- Type: family-fun
+- Narrative: playful<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+        
+Welcome, Joyful Explorer! It is wonderful to have you here. Since you are just starting your journey and enjoy family-friendly fun, TrailSaga – Hogwarts Expedition Series has prepared a delightful collection of easygoing and playful adventures just for you. Expect to find charming theme trails where learning and games go hand in hand. We will keep the pace relaxed so you can fully enjoy the smiles of your loved ones. Let's turn every small step into a happy memory!<|eot_id|><|start_header_id|>user<|end_header_id|>
+
+Profile:
+- Fitness: Advanced
+- Type: hiking, natural-scenery
+- Narrative: mystery<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+
+Greetings, Seeker of the Unknown! Your impressive fitness level tells us you are ready to conquer steep paths and deep forests. Because you are drawn to natural scenery and mystery, we have curated routes that lead not just to breathtaking views, but to ancient secrets hidden in the landscape. Prepare for challenging hikes where every turn might reveal a forgotten legend or a hidden ruin. The wild is calling, and it has a puzzle waiting for you to solve.<|eot_id|><|start_header_id|>user<|end_header_id|>
+
+Profile:
+- Fitness: Intermediate
+- Type: history-culture, urban-exploration
+- Narrative: adventure<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+
+Welcome, Urban Adventurer! Your solid fitness foundation makes you perfectly suited for exploring the stories hidden within city streets and historical landmarks. We've selected routes that blend physical challenge with cultural discovery, taking you through architectural marvels, forgotten alleyways, and vibrant neighborhoods. Each path is a chapter in a larger adventure, where past and present intertwine. Get ready to uncover tales that most visitors never see, one stride at a time.<|eot_id|><|start_header_id|>user<|end_header_id|>
+
+"""
+
+# Static part of the post-run summary prompt: system block, then the first
+# settings.post_run_fewshot_n examples. Fewer examples shorten prefill.
+POST_RUN_SYSTEM_PROMPT = """<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+    
+You are the TrailSaga – Hogwarts Expedition Series Achievement Generator. Create a motivating summary for a completed adventure.
+
+Guidelines:
+- Language: English only (do not use any other language)
+- Length: 60-80 words
+- Tone: Encouraging, celebratory, forward-looking
+- Include: specific achievements, recognition of effort, next challenge suggestion
+- Be specific to their performance and level
+
+Output only the summary, no additional text.<|eot_id|>"""
+
+POST_RUN_FEWSHOT_EXAMPLES = (
+    """<|start_header_id|>user<|end_header_id|>
+
+Route: Mountain Vista Trail
+Distance: 12.5 km
+Quests: 3/4 (75%)
+Level: 5<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+
+Congratulations on conquering the Mountain Vista Trail! You pushed through 12.5 kilometers of challenging terrain and completed most of your quests. Your determination is truly impressive. You're ready for even greater challenges now. Why not try a route with more elevation gain next time?<|eot_id|>""",
+    """<|start_header_id|>user<|end_header_id|>
+
+Route: River Loop Discovery
+Distance: 5.2 km
+Quests: 5/5 (100%)
+Level: 3<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+
+Perfect completion of the River Loop Discovery! You completed all five quests and covered every meter with focus and enthusiasm. This flawless performance shows you're mastering the fundamentals beautifully. Level 3 suits you well, but don't be surprised if you're ready for intermediate trails soon. Consider exploring urban heritage routes next.<|eot_id|>""",
+)
+
+POST_RUN_PROMPT_PREFIX: Final[str] = (
+    POST_RUN_SYSTEM_PROMPT
+    + "".join(POST_RUN_FEWSHOT_EXAMPLES[:settings.post_run_fewshot_n])
+    + "<|start_header_id|>user<|end_header_id|>\n\n"
+)
+
+# Full prompt templates: static few-shot prefix first, so Ollama can reuse its
+# KV cache, then the per-request fields filled in with str.format. The
+# prefixes must not contain literal braces.
+_WELCOME_PROMPT_TEMPLATE = WELCOME_PROMPT_PREFIX + """Profile:
+- Fitness: {fitness}
+- Type: {adventure_types_str}
+- Narrative: {narrative}
+- Narrative style: {narrative_hint}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+
+"""
+_POST_RUN_PROMPT_TEMPLATE = POST_RUN_PROMPT_PREFIX + """Route: {route_title}
+Distance: {route_length_km} km
+Quests: {quests_completed}/{total_quests} ({quest_completion_rate:.0f}%)
+Level: {user_level}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+
+"""
+
+
+def _estimate_prompt_tokens(text: str) -> int:
+    """
+    Conservative token count for Llama3 text (about 4 characters per token).
+    """
+    return len(text) // 4
+
+
+# Tokens of each static prefix, sent as num_keep so a context shift never
+# drops the cached prefix. Recomputed automatically when the prefixes change.
+WELCOME_PREFIX_TOKENS = _estimate_prompt_tokens(WELCOME_PROMPT_PREFIX)
+POST_RUN_PREFIX_TOKENS = _estimate_prompt_tokens(POST_RUN_PROMPT_PREFIX)
+
+# Reply budgets (num_predict) for the summary endpoints: the prompts' word
+# limits (100 and 80 words) at ~1.35 Llama3 tokens per word plus a small margin.
+# The stop sequences end a normal reply well before the budget; it only caps
+# replies that overrun the requested length.
+WELCOME_MAX_TOKENS = 150
+POST_RUN_MAX_TOKENS = 120
+
+# Llama3.1 end-of-turn markers: stop as soon as the assistant turn is over
+# instead of decoding up to num_predict
+CHAT_STOP_SEQUENCES = ("<|eot_id|>", "<|start_header_id|>")
+
+# Short post-run summaries can use a smaller, faster model; the welcome
+# summary keeps the main model
+POST_RUN_MODEL = settings.ollama_model_short or settings.ollama_model
+
+
+def _count_llm_event(name: str) -> None:
+    """
+    Increment an LLM metrics counter when metrics are enabled.
+    """
+    if settings.llm_metrics_enabled:
+        increment_llm_counter(name)
+
+
+def _record_generation_stats(final_chunk: dict) -> None:
+    """
+    Record the token and timing statistics from Ollama's final ``done`` chunk.
+    
+    A jump in prompt evaluation time for the same prompt size means the
+    prefix KV cache is no longer being reused.
+    """
+    if not settings.llm_metrics_enabled:
+        return
+    increment_llm_counter("ollama_generations")
+    prompt_tokens = final_chunk.get("prompt_eval_count")
+    if prompt_tokens is not None:
+        observe_llm_value("prompt_eval_tokens", prompt_tokens)
+    prompt_ns = final_chunk.get("prompt_eval_duration")
+    if prompt_ns is not None:
+        observe_llm_value("prompt_eval_ms", prompt_ns / 1e6)
+    eval_tokens = final_chunk.get("eval_count")
+    eval_ns = final_chunk.get("eval_duration")
+    if eval_tokens is not None:
+        observe_llm_value("eval_tokens", eval_tokens)
+        if eval_ns:
+            observe_llm_value("eval_tokens_per_sec", eval_tokens / (eval_ns / 1e9))
+
 
 async def call_ollama(
     prompt: str,
     max_tokens: int = 300,
-    temperature: float = 0.8
+    temperature: float = 0.8,
+    cache_ttl: Optional[float] = None,
+    num_keep: int = 0,
+    model: Optional[str] = None,
+    stop: Optional[tuple[str, ...]] = CHAT_STOP_SEQUENCES,
+    cache: bool = True
 ) -> str:
     """
     Unified wrapper for Ollama API calls with error handling.
     
+    The generation is streamed and accumulated, so tokens are pulled as soon
+    as Ollama emits them instead of waiting for one large buffered reply.
+    Identical requests are answered from the response cache when it is
+    enabled, and concurrent identical requests share a single Ollama call.
+    Neither applies when ``cache`` is False or the temperature is above 0.9.
+    
     Args:
         prompt: The prompt text to send to the model
         max_tokens: Maximum number of tokens to generate
         temperature: Sampling temperature for generation
+        cache_ttl: Lifetime of a cached response in seconds
+            (defaults to ``settings.response_cache_ttl``)
+        num_keep: Prompt tokens Ollama keeps when the context overflows
+            (the static prompt prefix)
+        model: Ollama model to use (defaults to ``settings.ollama_model``)
+        stop: Sequences that end the generation early
+            (defaults to the Llama3.1 end-of-turn markers; None disables)
+        cache: Set to False to always generate a fresh response
     
     Returns:
         str: Generated text response from the model
@@ -74,79 +614,395 @@ async def call_ollama(
     Raises:
         HTTPException: If the API call fails or returns empty response
     """
-    settings = get_settings()
+    model = model or settings.ollama_model
+    if not cache or temperature > _MAX_CACHEABLE_TEMPERATURE:
+        return await _request_ollama(prompt, model, max_tokens, temperature, num_keep, stop)
+    
+    key = _response_cache_key(prompt, model, max_tokens, temperature, stop)
+    if settings.response_cache_enabled:
+        cached = await _get_cached_response(key)
+        if cached is not None:
+            logger.debug("⚡ Ollama response cache hit: response_length=%d chars", len(cached))
+            _count_llm_event("response_cache_hits")
+            return cached
+        _count_llm_event("response_cache_misses")
+    
+    entry = _INFLIGHT_REQUESTS.get(key)
+    if entry is not None:
+        logger.debug("🔗 Joining in-flight Ollama request for identical prompt")
+        _count_llm_event("coalesced_requests")
+    else:
+        task = asyncio.ensure_future(_request_and_cache(
+            key,
+            cache_ttl if cache_ttl is not None else settings.response_cache_ttl,
+            prompt, model, max_tokens, temperature, num_keep, stop,
+        ))
+        entry = _InflightRequest(key, task)
+        _INFLIGHT_REQUESTS[key] = entry
+        task.add_done_callback(lambda _: _forget_inflight(entry))
+    
+    return await _join_inflight(entry)
+
+
+def _forget_inflight(entry: _InflightRequest) -> None:
+    """
+    Unregister an in-flight generation unless a newer one took its key.
+    """
+    if _INFLIGHT_REQUESTS.get(entry.key) is entry:
+        del _INFLIGHT_REQUESTS[entry.key]
+
+
+async def _join_inflight(entry: _InflightRequest) -> str:
+    """
+    Await a shared in-flight generation.
+    
+    The shared task is shielded while other callers still wait for it. When
+    the last waiting caller is cancelled (e.g. the client disconnected), the
+    task is cancelled too: leaving its ``client.stream()`` context makes
+    Ollama stop generating and frees the semaphore slot. A generation owned
+    by a :func:`_stream_shared` stream is left to that stream.
+    
+    Returns:
+        str: Generated text response from the model
+    """
+    entry.waiters += 1
+    try:
+        return await asyncio.shield(entry.future)
+    except asyncio.CancelledError:
+        if entry.waiters == 1 and isinstance(entry.future, asyncio.Task):
+            # Unregister now so a new caller starts a fresh generation
+            # instead of joining the cancelled one
+            _forget_inflight(entry)
+            entry.future.cancel()
+        raise
+    finally:
+        entry.waiters -= 1
+
+
+async def _request_and_cache(
+    key: str,
+    ttl: float,
+    prompt: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    num_keep: int,
+    stop: Optional[tuple[str, ...]]
+) -> str:
+    """
+    Run the shared in-flight request and cache its result.
+    
+    Storing from inside the task writes the cache once per generation rather
+    than once per coalesced caller, and before the in-flight entry is removed,
+    so a caller arriving in between finds either the task or the cached text.
+    
+    Returns:
+        str: Generated text response from the model
+    """
+    response_text = await _request_ollama(prompt, model, max_tokens, temperature, num_keep, stop)
+    if settings.response_cache_enabled and response_text:
+        await _store_cached_response(key, response_text, ttl)
+    return response_text
+
+
+async def _stream_shared(
+    prompt: str,
+    max_tokens: int,
+    temperature: float,
+    num_keep: int = 0,
+    model: Optional[str] = None,
+    cache_ttl: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a generation, reusing a cached or in-flight identical one.
+    
+    A cached response, or the result of an identical generation already in
+    flight (a :func:`call_ollama` call or another stream), is yielded as a
+    single piece instead of starting a new generation. A fresh stream is
+    registered as in flight until it ends, so identical requests arriving
+    meanwhile join it, and its reply is stored in the response cache.
+    
+    Args:
+        prompt: The prompt text to send to the model
+        max_tokens: Maximum number of tokens to generate
+        temperature: Sampling temperature for generation
+        num_keep: Prompt tokens Ollama keeps when the context overflows
+        model: Ollama model to use (defaults to ``settings.ollama_model``)
+        cache_ttl: Lifetime of a cached response in seconds
+            (defaults to ``settings.response_cache_ttl``)
+    
+    Yields:
+        str: Non-empty pieces of the generated text, in order
+    """
+    model = model or settings.ollama_model
+    key = _response_cache_key(prompt, model, max_tokens, temperature, CHAT_STOP_SEQUENCES)
+    cacheable = settings.response_cache_enabled and temperature <= _MAX_CACHEABLE_TEMPERATURE
+    if cacheable:
+        cached = await _get_cached_response(key)
+        if cached is not None:
+            _count_llm_event("response_cache_hits")
+            yield cached
+            return
+    entry = _INFLIGHT_REQUESTS.get(key)
+    if entry is not None:
+        _count_llm_event("coalesced_requests")
+        yield await _join_inflight(entry)
+        return
+    
+    entry = _InflightRequest(key, asyncio.get_running_loop().create_future())
+    _INFLIGHT_REQUESTS[key] = entry
+    pieces = []
+    try:
+        async for piece in call_ollama_stream(
+            prompt, max_tokens, temperature, num_keep=num_keep, model=model
+        ):
+            pieces.append(piece)
+            yield piece
+    except BaseException as e:
+        # Joined callers share the failure; a stream abandoned by its own
+        # client (cancelled or closed) fails them like an unavailable model
+        _forget_inflight(entry)
+        if entry.waiters:
+            entry.future.set_exception(
+                e if isinstance(e, Exception)
+                else HTTPException(status_code=503, detail="LLM generation was abandoned")
+            )
+        else:
+            entry.future.cancel()
+        raise
+    response_text = "".join(pieces).strip()
+    _forget_inflight(entry)
+    if not entry.future.done():
+        entry.future.set_result(response_text)
+    if cacheable and response_text:
+        await _store_cached_response(
+            key,
+            response_text,
+            cache_ttl if cache_ttl is not None else settings.response_cache_ttl,
+        )
+
+
+async def _request_ollama(
+    prompt: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    num_keep: int,
+    stop: Optional[tuple[str, ...]] = None,
+) -> str:
+    """
+    Run one generation through :func:`call_ollama_stream` and return the joined text.
+    
+    Raises:
+        HTTPException: If the API call fails or returns empty response
+    """
+    pieces = [
+        piece
+        async for piece in call_ollama_stream(
+            prompt, max_tokens, temperature, num_keep=num_keep, model=model, stop=stop
+        )
+    ]
+    return "".join(pieces).strip()
+
+
+def check_prompt_context_window() -> None:
+    """
+    Warn if a static prompt prefix plus its reply may not fit in ``num_ctx``.
+    
+    If the prefix does not fit, Ollama truncates the prompt and has to
+    re-evaluate it on every call, so the prefix KV cache is never reused.
+    Twice the prefix estimate is used as a pessimistic bound.
+    """
+    for name, prefix_tokens, max_tokens in (
+        ("welcome", WELCOME_PREFIX_TOKENS, WELCOME_MAX_TOKENS),
+        ("post-run", POST_RUN_PREFIX_TOKENS, POST_RUN_MAX_TOKENS),
+    ):
+        needed = 2 * prefix_tokens + max_tokens
+        if needed > settings.ollama_num_ctx:
+            logger.warning(
+                f"⚠️ OLLAMA_NUM_CTX={settings.ollama_num_ctx} may be too small for the {name} prompt "
+                f"(up to ~{needed} tokens); its cached prefix may not be reused"
+            )
+
+
+async def prewarm_ollama() -> None:
+    """
+    Load the model and prefill the static prompt prefixes ahead of user traffic.
+    
+    Sends each prefix with ``num_predict=1``, bypassing the response cache,
+    so the first real welcome or post-run request starts from a loaded model
+    and a warm KV cache. An empty reply is fine here. Failures are logged and
+    ignored; only an unreachable Ollama (or an open breaker) skips the
+    remaining prefixes, since the post-run prompt may use a different model.
+    """
+    for name, prefix, model, num_keep in (
+        ("welcome", WELCOME_PROMPT_PREFIX, settings.ollama_model, WELCOME_PREFIX_TOKENS),
+        ("post-run", POST_RUN_PROMPT_PREFIX, POST_RUN_MODEL, POST_RUN_PREFIX_TOKENS),
+    ):
+        try:
+            async for _ in call_ollama_stream(
+                prefix, max_tokens=1, temperature=0.0, num_keep=num_keep, model=model,
+                require_output=False
+            ):
+                pass
+            logger.info(f"🔥 Ollama prewarmed: {name} prompt prefix")
+        except HTTPException as e:
+            logger.warning(f"⚠️ Ollama prewarm skipped ({name}): {e.detail}")
+            # The HTTPException is raised while handling the httpx error
+            if e.status_code == 503 or isinstance(e.__context__, httpx.ConnectError):
+                return
+
+
+async def _iter_ndjson(response: httpx.Response) -> AsyncIterator[dict]:
+    """
+    Parse a newline-delimited JSON response body as it arrives.
+    
+    Lines are split from the raw bytes and handed to orjson directly,
+    skipping httpx's per-line text decoding.
+    
+    Args:
+        response: Open streaming response
+    
+    Yields:
+        dict: One parsed JSON object per non-empty line
+    """
+    pending = bytearray()
+    async for data in response.aiter_bytes():
+        pending += data
+        start = 0
+        while (end := pending.find(b"\n", start)) != -1:
+            if end > start:
+                yield orjson.loads(pending[start:end])
+            start = end + 1
+        del pending[:start]
+    if pending.strip():
+        yield orjson.loads(pending)
+
+
+async def call_ollama_stream(
+    prompt: str,
+    max_tokens: int = 300,
+    temperature: float = 0.8,
+    num_keep: int = 0,
+    model: Optional[str] = None,
+    stop: Optional[tuple[str, ...]] = CHAT_STOP_SEQUENCES,
+    require_output: bool = True
+) -> AsyncIterator[str]:
+    """
+    Stream an Ollama generation, yielding text as it is generated.
+    
+    This is the single request path to Ollama: :func:`call_ollama` joins the
+    pieces for callers that need the full string, while user-facing endpoints
+    can show the first words while the rest is still being decoded.
+    
+    Args:
+        prompt: The prompt text to send to the model
+        max_tokens: Maximum number of tokens to generate
+        temperature: Sampling temperature for generation
+        num_keep: Prompt tokens Ollama keeps when the context overflows
+        model: Ollama model to use (defaults to ``settings.ollama_model``)
+        stop: Sequences that end the generation early
+            (defaults to the Llama3.1 end-of-turn markers; None disables)
+        require_output: Treat a generation that yields no text as an error
+    
+    Yields:
+        str: Non-empty pieces of the generated text, in order
+        
+    Raises:
+        HTTPException: If the API call fails or the stream ends without
+            output (unless ``require_output`` is False)
+    """
+    model = model or settings.ollama_model
     start_time = time.time()
+    response_length = 0
+    queue_wait_ms = 0.0
+    final_chunk: dict = {}
     
-    logger.debug(f"🤖 Calling Ollama API: model={settings.ollama_model}, max_tokens={max_tokens}, temperature={temperature}")
-    logger.debug(f"📝 Prompt length: {len(prompt)} characters")
+    # Lazy %-formatting: these run on every call and are off in production
+    logger.debug("🤖 Calling Ollama API: model=%s, max_tokens=%d, temperature=%s", model, max_tokens, temperature)
+    logger.debug("📝 Prompt length: %d characters", len(prompt))
+    _check_ollama_breaker()
     
     try:
-        async with httpx.AsyncClient(timeout=settings.ollama_timeout) as client:
-            response = await client.post(
+        client = get_ollama_client()
+        async with _get_ollama_semaphore():
+            # Time spent waiting for a free slot; a growing value means the
+            # concurrency limit, not Ollama itself, is the bottleneck
+            queue_wait_ms = (time.time() - start_time) * 1000
+            if settings.llm_metrics_enabled:
+                observe_llm_value("ollama_queue_wait_ms", queue_wait_ms)
+            async with client.stream(
+                "POST",
                 settings.ollama_api_url,
-                json={
-                    "model": settings.ollama_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature,
-                        "num_predict": max_tokens,
-                    },
-                },
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            duration_ms = (time.time() - start_time) * 1000
-            
-            if "response" in result and result.get("done", False):
-                response_text = result["response"].strip()
-                logger.debug(f"✅ Ollama API call succeeded: response_length={len(response_text)} chars, duration={duration_ms:.2f}ms")
-            duration_ms = (time.time() - start_time) * 1000
-            
-            if "response" in result and result.get("done", False):
-                response_text = result["response"].strip()
-                logger.debug(f"✅ Ollama API call succeeded: response_length={len(response_text)} chars, duration={duration_ms:.2f}ms")
-                log_api_call(
-                    logger,
-                    "Ollama",
-                    settings.ollama_api_url,
-                    method="POST",
-                    duration_ms=duration_ms,
-                    success=True,
-                    model=settings.ollama_model,
-                    response_length=len(response_text)
-                )
-                return response_text
-            
+                content=_build_request_body(prompt, model, max_tokens, temperature, num_keep, stop),
+                headers=_JSON_HEADERS,
+            ) as response:
+                if response.is_error:
+                    await response.aread()  # Load the error body for logging
+                response.raise_for_status()
+                async for chunk in _iter_ndjson(response):
+                    if "error" in chunk:
+                        raise OllamaStreamError(f"Ollama stream error: {chunk['error']}")
+                    piece = chunk.get("response", "")
+                    if piece:
+                        response_length += len(piece)
+                        yield piece
+                    if chunk.get("done"):
+                        final_chunk = chunk
+                        _record_generation_stats(chunk)
+                        break
+        
+        if not response_length and require_output:
             logger.error("❌ Ollama API returned empty response")
             raise ValueError("Empty response from Ollama")
+        
+        duration_ms = (time.time() - start_time) * 1000
+        logger.debug(
+            "✅ Ollama API call succeeded: response_length=%d chars, prompt_tokens=%s, duration=%.2fms",
+            response_length, final_chunk.get("prompt_eval_count"), duration_ms
+        )
+        log_api_call(
+            logger,
+            "Ollama",
+            settings.ollama_api_url,
+            method="POST",
+            duration_ms=duration_ms,
+            success=True,
+            model=model,
+            response_length=response_length,
+            queue_wait_ms=round(queue_wait_ms, 2)
+        )
+        _record_ollama_outcome(True)
     
     except httpx.HTTPStatusError as e:
-        duration_ms = (time.time() - start_time) * 1000
         logger.error(f"❌ Ollama API HTTP error: status={e.response.status_code}, detail={e.response.text}")
+        _count_llm_event("ollama_errors")
+        # A 4xx (e.g. unknown model) is a request problem, not an Ollama outage
+        if e.response.status_code >= 500:
+            _record_ollama_outcome(False)
         log_api_call(
             logger,
             "Ollama",
             settings.ollama_api_url,
             method="POST",
-            duration_ms=duration_ms,
+            duration_ms=(time.time() - start_time) * 1000,
             success=False,
             status_code=e.response.status_code
         )
         raise HTTPException(
             status_code=e.response.status_code,
-            detail=f"Ollama API error: {str(e)}"
+            detail=f"Ollama API error: HTTP {e.response.status_code}"
         )
-    except httpx.TimeoutException as e:
-        duration_ms = (time.time() - start_time) * 1000
-        logger.error(f"❌ Ollama API timeout: timeout={settings.ollama_timeout}s, duration={duration_ms:.2f}ms")
+    except httpx.TimeoutException:
+        logger.error(f"❌ Ollama API timeout: timeout={settings.ollama_timeout}s, duration={(time.time() - start_time) * 1000:.2f}ms")
+        _count_llm_event("ollama_errors")
+        _record_ollama_outcome(False)
         log_api_call(
             logger,
             "Ollama",
             settings.ollama_api_url,
             method="POST",
-            duration_ms=duration_ms,
+            duration_ms=(time.time() - start_time) * 1000,
             success=False,
             error="timeout"
         )
@@ -154,24 +1010,157 @@ async def call_ollama(
             status_code=504,
             detail=f"Ollama API timeout after {settings.ollama_timeout}s"
         )
-    except Exception as e:
-        duration_ms = (time.time() - start_time) * 1000
-        logger.error(f"❌ Ollama API call failed: {type(e).__name__}: {str(e)}", exc_info=True)
+    # Transport errors and malformed/empty replies become a 500. Anything else,
+    # including cancellation, propagates unchanged; leaving the stream context
+    # closes the connection, which makes Ollama stop generating. The full error
+    # is only logged; clients get the exception type without internal details.
+    except (httpx.HTTPError, ValueError) as e:
+        logger.exception(f"❌ Ollama API call failed: {type(e).__name__}: {str(e)}")
+        _count_llm_event("ollama_errors")
+        # Connection errors and failures Ollama reports in the stream (runner
+        # crash, out of memory) count against the breaker; an empty or
+        # malformed reply leaves it unchanged
+        if isinstance(e, (httpx.TransportError, OllamaStreamError)):
+            _record_ollama_outcome(False)
         log_api_call(
             logger,
             "Ollama",
             settings.ollama_api_url,
             method="POST",
-            duration_ms=duration_ms,
+            duration_ms=(time.time() - start_time) * 1000,
             success=False,
             error=type(e).__name__
         )
         raise HTTPException(
             status_code=500,
-            detail=f"Story generation failed: {str(e)}"
+            detail=f"LLM generation failed: {type(e).__name__}"
         )
 
 
+_CONSOLE_RULE = "=" * 80
+_CONSOLE_SEPARATOR = "-" * 80
+
+
+def _write_console_block(heading: str, details: list[str], body: str) -> None:
+    """
+    Print a generation banner to stdout with a single write.
+    
+    Args:
+        heading: Banner line
+        details: Lines printed between the heading and the body
+        body: Main text of the block
+    """
+    sys.stdout.write(
+        f"\n{_CONSOLE_RULE}\n{heading}\n{_CONSOLE_RULE}\n"
+        + "".join(f"{line}\n" for line in details)
+        + f"{_CONSOLE_SEPARATOR}\n{body}\n{_CONSOLE_RULE}\n\n"
+    )
+    sys.stdout.flush()
+
+
+def _emit_llm_log(
+    heading: str,
+    details: list[str],
+    generated_text: str,
+    message_type: str,
+    title: str,
+    metadata: dict,
+    content: Optional[str] = None,
+) -> None:
+    """
+    Print a generated text to the console and log it to the UI.
+    
+    Args:
+        heading: Banner line, e.g. "✨ LLM GENERATED: Welcome Summary"
+        details: Input summary lines printed above the text
+        generated_text: The generated text
+        message_type: LLM logger message type
+        title: LLM logger message title
+        metadata: LLM logger message metadata
+        content: UI log content, if different from ``generated_text``
+    """
+    # Print LLM generated content to console
+    _write_console_block(heading, details, generated_text)
+    
+    # Log to UI
+    log_llm_output(
+        message_type=message_type,
+        title=title,
+        content=generated_text if content is None else content,
+        metadata=metadata
+    )
+
+
+def _log_in_background(*args) -> None:
+    """
+    Run :func:`_emit_llm_log` in a worker thread.
+    
+    Console writes block, so the caller returns the generated text right away
+    instead of waiting on stdout. Outside an event loop it logs inline.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        _emit_llm_log(*args)
+        return
+    task = asyncio.create_task(asyncio.to_thread(_emit_llm_log, *args))
+    _LOG_TASKS.add(task)
+    task.add_done_callback(_LOG_TASKS.discard)
+
+
+@lru_cache(maxsize=512)
+def _profile_fields(types: tuple[str, ...], narrative: str) -> tuple[str, str]:
+    """
+    Derive the questionnaire fields shown in the welcome prompt.
+    
+    Args:
+        types: Selected adventure types
+        narrative: Selected narrative style key
+    
+    Returns:
+        tuple[str, str]: ``(adventure_types_str, narrative_hint)``
+    """
+    # Build adventure types list for the prompt
+    adventure_types_str = ", ".join(types) if types else "exploration"
+    
+    # Get detailed narrative style instructions
+    narrative_hint = NARRATIVE_STYLE_PROMPTS.get(
+        narrative,
+        "Use a neutral, friendly narrative tone."
+    )
+    return adventure_types_str, narrative_hint
+
+
+@lru_cache(maxsize=256)
+def _build_welcome_prompt(fitness: str, types: tuple[str, ...], narrative: str) -> str:
+    """
+    Build the Llama3.1 few-shot prompt for a welcome summary.
+    
+    Memoized: questionnaire answers come from a small set of choices, so
+    repeated profiles reuse the assembled prompt.
+    """
+    adventure_types_str, narrative_hint = _profile_fields(types, narrative)
+    
+    return _WELCOME_PROMPT_TEMPLATE.format(
+        fitness=fitness,
+        adventure_types_str=adventure_types_str,
+        narrative=narrative,
+        narrative_hint=narrative_hint,
+    )
+
+
+def _welcome_prompt(questionnaire: ProfileCreate) -> str:
+    """
+    Build the welcome prompt for a questionnaire.
+    
+    Adventure types are sorted: the same selection made in a different order
+    yields the same prompt, so it shares the response cache entry.
+    """
+    return _build_welcome_prompt(
+        questionnaire.fitness, tuple(sorted(questionnaire.type or ())), questionnaire.narrative
+    )
+
+
 async def generate_welcome_summary(questionnaire: ProfileCreate) -> str:
     """
     Generate a personalized welcome summary using Llama3.1:8b.
@@ -194,111 +1183,108 @@ async def generate_welcome_summary(questionnaire: ProfileCreate) -> str:
     
     Raises
     ------
-    httpx.HTTPError
-        If Ollama API call fails
-    httpx.TimeoutException
-        If Ollama API times out
+    HTTPException
+        If the Ollama API call fails or times out
+    ValueError
+        If Ollama returns an empty response
     """
-    # Build adventure types list for the prompt
-    adventure_types_str = ", ".join(questionnaire.type) if questionnaire.type else "exploration"
-    
-    # Get detailed narrative style instructions
-    narrative_hint = NARRATIVE_STYLE_PROMPTS.get(
-        questionnaire.narrative,
-        "Use a neutral, friendly narrative tone."
+    prompt = _welcome_prompt(questionnaire)
+
+    response = await call_ollama(
+        prompt=prompt,
+        max_tokens=WELCOME_MAX_TOKENS,
+        temperature=0.6,  # Balanced creativity and consistency
+        cache_ttl=WELCOME_CACHE_TTL,
+        num_keep=WELCOME_PREFIX_TOKENS
     )
     
-    # Construct prompt using Llama3.1 chat template with few-shot examples
-    prompt = f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+    # Clean up response
+    generated_text = response.strip()
     
-You are the TrailSaga – Hogwarts Expedition Series AI Guide. Generate a personalized, engaging welcome message for a new user.
-
-Guidelines:
-- Length: 80-100 words
-- Tone: Warm, encouraging, and adventurous
-- Focus on: fitness level, adventure preferences, narrative style
-- Do NOT: invent character names, describe physical appearance, use generic phrases
-- Start with a creative explorer title that matches their profile
-
-The narrative style should follow this description: "{narrative_hint}"
-
-Output only the welcome message, no additional text.<|eot_id|><|start_header_id|>user<|end_header_id|>
-
-Profile:
-- Fitness: Beginner
-- Type: family-fun
-- Narrative: playful<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+    # Remove any markdown or extra formatting
+    if generated_text.startswith(("**", "#")):
+        generated_text = _MARKDOWN_LINE_BREAK.sub(" ", generated_text).strip("*#").strip()
+    
+    if generated_text:
+        _log_in_background(
+            "✨ LLM GENERATED: Welcome Summary",
+            [
+                f"📋 Profile: Fitness={questionnaire.fitness}, Type={questionnaire.type}, Narrative={questionnaire.narrative}",
+                f"🤖 Model: {settings.ollama_model}",
+            ],
+            generated_text,
+            "welcome",
+            "✨ Welcome Summary Generated",
+            {
+                "fitness": questionnaire.fitness,
+                "type": questionnaire.type,
+                "narrative": questionnaire.narrative,
+                "model": settings.ollama_model
+            },
+        )
         
-Welcome, Joyful Explorer! It is wonderful to have you here. Since you are just starting your journey and enjoy family-friendly fun, TrailSaga – Hogwarts Expedition Series has prepared a delightful collection of easygoing and playful adventures just for you. Expect to find charming theme trails where learning and games go hand in hand. We will keep the pace relaxed so you can fully enjoy the smiles of your loved ones. Let's turn every small step into a happy memory!<|eot_id|><|start_header_id|>user<|end_header_id|>
-
-Profile:
-- Fitness: Advanced
-- Type: hiking, natural-scenery
-- Narrative: mystery<|eot_id|><|start_header_id|>assistant<|end_header_id|>
-
-Greetings, Seeker of the Unknown! Your impressive fitness level tells us you are ready to conquer steep paths and deep forests. Because you are drawn to natural scenery and mystery, we have curated routes that lead not just to breathtaking views, but to ancient secrets hidden in the landscape. Prepare for challenging hikes where every turn might reveal a forgotten legend or a hidden ruin. The wild is calling, and it has a puzzle waiting for you to solve.<|eot_id|><|start_header_id|>user<|end_header_id|>
+        return generated_text
+    
+    raise ValueError("Empty response from Ollama")
 
-Profile:
-- Fitness: Intermediate
-- Type: history-culture, urban-exploration
-- Narrative: adventure<|eot_id|><|start_header_id|>assistant<|end_header_id|>
 
-Welcome, Urban Adventurer! Your solid fitness foundation makes you perfectly suited for exploring the stories hidden within city streets and historical landmarks. We've selected routes that blend physical challenge with cultural discovery, taking you through architectural marvels, forgotten alleyways, and vibrant neighborhoods. Each path is a chapter in a larger adventure, where past and present intertwine. Get ready to uncover tales that most visitors never see, one stride at a time.<|eot_id|><|start_header_id|>user<|end_header_id|>
-
-Profile:
-- Fitness: {questionnaire.fitness}
-- Type: {adventure_types_str}
-- Narrative: {questionnaire.narrative}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+async def generate_welcome_summary_stream(questionnaire: ProfileCreate) -> AsyncIterator[str]:
+    """
+    Stream a personalized welcome summary as it is generated.
+    
+    Streaming counterpart of :func:`generate_welcome_summary` for endpoints
+    that forward the text to the client (e.g. over Server-Sent Events).
+    A summary that is already cached or being generated is sent as a
+    single piece.
+    
+    Parameters
+    ----------
+    questionnaire : ProfileCreate
+        User's questionnaire answers (fitness, type, narrative)
+    
+    Yields
+    ------
+    str
+        Pieces of the welcome message, in order
+    
+    Raises
+    ------
+    HTTPException
+        If the Ollama API call fails
+    """
+    async for piece in _stream_shared(
+        prompt=_welcome_prompt(questionnaire),
+        max_tokens=WELCOME_MAX_TOKENS,
+        temperature=0.6,
+        num_keep=WELCOME_PREFIX_TOKENS,
+        cache_ttl=WELCOME_CACHE_TTL
+    ):
+        yield piece
 
-"""
 
-    try:
-        response = await call_ollama(
-            prompt=prompt,
-            max_tokens=170,
-            temperature=0.6  # Balanced creativity and consistency
-        )
-        
-        # Clean up response
-        generated_text = response.strip()
-        
-        # Remove any markdown or extra formatting
-        if generated_text.startswith("**") or generated_text.startswith("#"):
-            lines = generated_text.split('\n')
-            generated_text = ' '.join(line.strip('*#').strip() for line in lines if line.strip())
-        
-        if generated_text:
-            # Print LLM generated content to console
-            print("\n" + "="*80)
-            print("✨ LLM GENERATED: Welcome Summary")
-            print("="*80)
-            print(f"📋 Profile: Fitness={questionnaire.fitness}, Type={questionnaire.type}, Narrative={questionnaire.narrative}")
-            print(f"🤖 Model: {get_settings().ollama_model}")
-            print("-"*80)
-            print(generated_text)
-            print("="*80 + "\n")
-            
-            # Log to UI
-            from app.llm_logger import log_llm_output
-            log_llm_output(
-                message_type="welcome",
-                title="✨ Welcome Summary Generated",
-                content=generated_text,
-                metadata={
-                    "fitness": questionnaire.fitness,
-                    "type": questionnaire.type,
-                    "narrative": questionnaire.narrative,
-                    "model": get_settings().ollama_model
-                }
-            )
-            
-            return generated_text
-        
-        raise ValueError("Empty response from Ollama")
+@lru_cache(maxsize=256)
+def _build_post_run_prompt(
+    route_title: str,
+    route_length_km: float,
+    quests_completed: int,
+    total_quests: int,
+    user_level: int,
+) -> str:
+    """
+    Build the Llama3.1 few-shot prompt for a post-run summary.
     
-    except Exception as e:
-        # Re-raise to allow caller to handle with fallback
-        raise e
+    Memoized; callers round ``route_length_km`` to one decimal so the same
+    route and result map to the same prompt.
+    """
+    quest_completion_rate = (quests_completed / total_quests * 100) if total_quests > 0 else 0
+    return _POST_RUN_PROMPT_TEMPLATE.format(
+        route_title=route_title,
+        route_length_km=route_length_km,
+        quests_completed=quests_completed,
+        total_quests=total_quests,
+        quest_completion_rate=quest_completion_rate,
+        user_level=user_level,
+    )
 
 
 async def generate_post_run_summary(
@@ -334,91 +1320,92 @@ async def generate_post_run_summary(
     
     Raises
     ------
-    httpx.HTTPError
-        If Ollama API call fails
+    HTTPException
+        If the Ollama API call fails or times out
+    ValueError
+        If Ollama returns an empty response
     """
     quest_completion_rate = (quests_completed / total_quests * 100) if total_quests > 0 else 0
+    prompt = _build_post_run_prompt(
+        route_title, round(route_length_km, 1), quests_completed, total_quests, user_level
+    )
+
+    response = await call_ollama(
+        prompt=prompt,
+        max_tokens=POST_RUN_MAX_TOKENS,
+        temperature=0.75,  # Balanced for consistency and variety
+        num_keep=POST_RUN_PREFIX_TOKENS,
+        model=POST_RUN_MODEL
+    )
     
-    # Construct prompt using Llama3.1 chat template with few-shot examples
-    prompt = f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+    generated_text = response.strip()
+    if generated_text:
+        _log_in_background(
+            "✨ LLM GENERATED: Post-Run Summary",
+            [
+                f"🗺️ Route: {route_title}",
+                f"📏 Distance: {route_length_km} km",
+                f"🏆 Quests: {quests_completed}/{total_quests} ({quest_completion_rate:.0f}%)",
+                f"📈 Level: {user_level}",
+            ],
+            generated_text,
+            "post_run",
+            f"🏁 Post-Run Summary: {route_title}",
+            {
+                "route_title": route_title,
+                "distance_km": route_length_km,
+                "quests_completed": quests_completed,
+                "total_quests": total_quests,
+                "user_level": user_level
+            },
+        )
+        
+        return generated_text
     
-You are the TrailSaga – Hogwarts Expedition Series Achievement Generator. Create a motivating summary for a completed adventure.
-
-Guidelines:
-- Language: English only (do not use any other language)
-- Length: 60-80 words
-- Tone: Encouraging, celebratory, forward-looking
-- Include: specific achievements, recognition of effort, next challenge suggestion
-- Be specific to their performance and level
+    raise ValueError("Empty response from Ollama")
 
-Output only the summary, no additional text.<|eot_id|><|start_header_id|>user<|end_header_id|>
 
-Route: Mountain Vista Trail
-Distance: 12.5 km
-Quests: 3/4 (75%)
-Level: 5<|eot_id|><|start_header_id|>assistant<|end_header_id|>
-
-Congratulations on conquering the Mountain Vista Trail! You pushed through 12.5 kilometers of challenging terrain and completed most of your quests. Your determination is truly impressive. You're ready for even greater challenges now. Why not try a route with more elevation gain next time?<|eot_id|><|start_header_id|>user<|end_header_id|>
-
-Route: River Loop Discovery
-Distance: 5.2 km
-Quests: 5/5 (100%)
-Level: 3<|eot_id|><|start_header_id|>assistant<|end_header_id|>
-
-Perfect completion of the River Loop Discovery! You completed all five quests and covered every meter with focus and enthusiasm. This flawless performance shows you're mastering the fundamentals beautifully. Level 3 suits you well, but don't be surprised if you're ready for intermediate trails soon. Consider exploring urban heritage routes next.<|eot_id|><|start_header_id|>user<|end_header_id|>
-
-Route: {route_title}
-Distance: {route_length_km} km
-Quests: {quests_completed}/{total_quests} ({quest_completion_rate:.0f}%)
-Level: {user_level}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
+async def generate_post_run_summary_stream(
+    route_title: str,
+    route_length_km: float,
+    quests_completed: int,
+    total_quests: int,
+    user_level: int,
+) -> AsyncIterator[str]:
+    """
+    Stream a post-run summary as it is generated.
+    
+    Streaming counterpart of :func:`generate_post_run_summary`; takes the
+    same parameters.
+    
+    Yields
+    ------
+    str
+        Pieces of the summary, in order
+    
+    Raises
+    ------
+    HTTPException
+        If the Ollama API call fails
+    """
+    prompt = _build_post_run_prompt(
+        route_title, round(route_length_km, 1), quests_completed, total_quests, user_level
+    )
+    async for piece in _stream_shared(
+        prompt=prompt,
+        max_tokens=POST_RUN_MAX_TOKENS,
+        temperature=0.75,
+        num_keep=POST_RUN_PREFIX_TOKENS,
+        model=POST_RUN_MODEL
+    ):
+        yield piece
 
-"""
 
-    try:
-        response = await call_ollama(
-            prompt=prompt,
-            max_tokens=150,
-            temperature=0.75  # Balanced for consistency and variety
-        )
-        
-        generated_text = response.strip()
-        if generated_text:
-            # Print LLM generated content to console
-            print("\n" + "="*80)
-            print("✨ LLM GENERATED: Post-Run Summary")
-            print("="*80)
-            print(f"🗺️ Route: {route_title}")
-            print(f"📏 Distance: {route_length_km} km")
-            print(f"🏆 Quests: {quests_completed}/{total_quests} ({quest_completion_rate:.0f}%)")
-            print(f"📈 Level: {user_level}")
-            print("-"*80)
-            print(generated_text)
-            print("="*80 + "\n")
-            
-            # Log to UI
-            from app.llm_logger import log_llm_output
-            log_llm_output(
-                message_type="post_run",
-                title=f"🏁 Post-Run Summary: {route_title}",
-                content=generated_text,
-                metadata={
-                    "route_title": route_title,
-                    "distance_km": route_length_km,
-                    "quests_completed": quests_completed,
-                    "total_quests": total_quests,
-                    "user_level": user_level
-                }
-            )
-            
-            return generated_text
-        
-        raise ValueError("Empty response from Ollama")
-    
-    except Exception as e:
-        raise e
+# Route difficulty names, indexed by the 0-3 difficulty scale
+_DIFFICULTY_NAMES: tuple[str, ...] = ("Easy", "Moderate", "Difficult", "Expert")
 
 
-async def generate_pixel_art_svg(
+def generate_pixel_art_svg(
     route_title: str,
     route_location: Optional[str],
     completed_at: datetime,
@@ -452,12 +1439,12 @@ async def generate_pixel_art_svg(
     str
         SVG code as a string (pixel art style)
     """
-    # Use template-based system instead of LLM generation
-    from app.services.svg_templates import generate_souvenir_svg
-    
     # Map difficulty
-    difficulty_map = {0: "Easy", 1: "Moderate", 2: "Difficult", 3: "Expert"}
-    difficulty_str = difficulty_map.get(difficulty, "Unknown") if difficulty is not None else "Unknown"
+    difficulty_str = (
+        _DIFFICULTY_NAMES[difficulty]
+        if difficulty is not None and 0 <= difficulty < len(_DIFFICULTY_NAMES)
+        else "Unknown"
+    )
     
     # Generate SVG using template system
     generated_svg = generate_souvenir_svg(
@@ -470,31 +1457,23 @@ async def generate_pixel_art_svg(
     )
     
     # Format for logging
-    date_str = completed_at.strftime("%Y-%m-%d")
-    time_str = completed_at.strftime("%H:%M")
+    date_str, time_str = f"{completed_at:%Y-%m-%d %H:%M}".split(" ")
     location_str = route_location if route_location else "Unknown Location"
     
-    # Print generated content to console
-    print("\n" + "="*80)
-    print("🎨 TEMPLATE GENERATED: Pixel Art SVG")
-    print("="*80)
-    print(f"🗺️ Route: {route_title}")
-    print(f"📍 Location: {location_str}")
-    print(f"📅 Completed: {date_str} at {time_str}")
-    print(f"⭐ XP: {xp_gained}")
-    print(f"📏 Distance: {distance_km:.1f} km")
-    print(f"🎯 Difficulty: {difficulty_str}")
-    print("-"*80)
-    print(f"SVG Length: {len(generated_svg)} characters")
-    print("="*80 + "\n")
-    
-    # Log to UI
-    from app.llm_logger import log_llm_output
-    log_llm_output(
-        message_type="pixel_art",
-        title=f"🎨 Pixel Art Generated: {route_title}",
-        content=f"Generated {len(generated_svg)} character SVG (Template-based)",
-        metadata={
+    _log_in_background(
+        "🎨 TEMPLATE GENERATED: Pixel Art SVG",
+        [
+            f"🗺️ Route: {route_title}",
+            f"📍 Location: {location_str}",
+            f"📅 Completed: {date_str} at {time_str}",
+            f"⭐ XP: {xp_gained}",
+            f"📏 Distance: {distance_km:.1f} km",
+            f"🎯 Difficulty: {difficulty_str}",
+        ],
+        f"SVG Length: {len(generated_svg)} characters",
+        "pixel_art",
+        f"🎨 Pixel Art Generated: {route_title}",
+        {
             "route_title": route_title,
             "location": location_str,
             "completed_at": date_str,
@@ -502,98 +1481,9 @@ async def generate_pixel_art_svg(
             "distance_km": distance_km,
             "difficulty": difficulty_str,
             "method": "template"
-        }
+        },
+        f"Generated {len(generated_svg)} character SVG (Template-based)",
     )
     
     return generated_svg
 
-
-def _create_fallback_pixel_svg(
-    route_title: str,
-    location: str,
-    date_str: str,
-    time_str: str,
-    xp_gained: int,
-    distance_km: float,
-    difficulty_str: str,
-) -> str:
-    """
-    Create a cute fallback pixel art SVG if LLM generation fails.
-    """
-    # Truncate title if too long
-    title_display = route_title[:18] + "..." if len(route_title) > 18 else route_title
-    
-    return f'''<svg viewBox="0 0 400 300" xmlns="http://www.w3.org/2000/svg" style="font-family: 'Comic Sans MS', monospace; font-size: 12px;">
-  <!-- Cute Gradient Background -->
-  <defs>
-    <linearGradient id="bgGradient" x1="0%" y1="0%" x2="100%" y2="100%">
-      <stop offset="0%" style="stop-color:#FFE4E1;stop-opacity:1" />
-      <stop offset="100%" style="stop-color:#E6E6FA;stop-opacity:1" />
-    </linearGradient>
-  </defs>
-  <rect width="400" height="300" fill="url(#bgGradient)"/>
-  
-  <!-- Cute Rounded Border -->
-  <rect x="15" y="15" width="370" height="270" rx="15" fill="none" stroke="#FFB6C1" stroke-width="5"/>
-  <rect x="20" y="20" width="360" height="260" rx="12" fill="none" stroke="#98FB98" stroke-width="3"/>
-  
-  <!-- Cute Mountain with Happy Face (Kawaii Style) -->
-  <polygon points="200,70 150,130 250,130" fill="#87CEEB" stroke="#FFB6C1" stroke-width="3"/>
-  <polygon points="200,90 170,130 230,130" fill="#98FB98"/>
-  <!-- Happy face on mountain -->
-  <circle cx="185" cy="100" r="4" fill="#000"/>
-  <circle cx="215" cy="100" r="4" fill="#000"/>
-  <path d="M 185 110 Q 200 118 215 110" stroke="#000" stroke-width="2" fill="none"/>
-  
-  <!-- Cute Sun -->
-  <circle cx="320" cy="50" r="20" fill="#FFE4B5" stroke="#FFB6C1" stroke-width="2"/>
-  <circle cx="320" cy="50" r="15" fill="#FFD700"/>
-  <!-- Sun rays -->
-  <line x1="320" y1="25" x2="320" y2="20" stroke="#FFD700" stroke-width="3" stroke-linecap="round"/>
-  <line x1="345" y1="50" x2="350" y2="50" stroke="#FFD700" stroke-width="3" stroke-linecap="round"/>
-  <line x1="320" y1="75" x2="320" y2="80" stroke="#FFD700" stroke-width="3" stroke-linecap="round"/>
-  <line x1="295" y1="50" x2="290" y2="50" stroke="#FFD700" stroke-width="3" stroke-linecap="round"/>
-  
-  <!-- Sparkles around title -->
-  <text x="200" y="165" text-anchor="middle" fill="#FF69B4" font-size="18" font-weight="bold">✨ {title_display} ✨</text>
-  
-  <!-- Location with cute icon -->
-  <circle cx="170" cy="185" r="3" fill="#FFB6C1"/>
-  <text x="180" y="190" fill="#6A5ACD" font-size="11" font-weight="bold">📍 {location[:22]}</text>
-  
-  <!-- Cute Stats Grid with rounded corners -->
-  <!-- XP Badge -->
-  <rect x="40" y="210" width="90" height="60" rx="8" fill="#FFE4E1" stroke="#FFB6C1" stroke-width="3"/>
-  <text x="85" y="235" text-anchor="middle" fill="#FF69B4" font-size="16" font-weight="bold">⭐ {xp_gained}</text>
-  <text x="85" y="250" text-anchor="middle" fill="#6A5ACD" font-size="10" font-weight="bold">XP</text>
-  <!-- Sparkle decoration -->
-  <text x="60" y="230" fill="#FFD700" font-size="10">✨</text>
-  <text x="110" y="235" fill="#FFD700" font-size="8">⭐</text>
-  
-  <!-- Distance Badge -->
-  <rect x="150" y="210" width="90" height="60" rx="8" fill="#E6F3FF" stroke="#87CEEB" stroke-width="3"/>
-  <text x="195" y="235" text-anchor="middle" fill="#4169E1" font-size="16" font-weight="bold">👣 {distance_km:.1f}</text>
-  <text x="195" y="250" text-anchor="middle" fill="#6A5ACD" font-size="10" font-weight="bold">KM</text>
-  
-  <!-- Difficulty Badge -->
-  <rect x="260" y="210" width="90" height="60" rx="8" fill="#F0FFF0" stroke="#98FB98" stroke-width="3"/>
-  <text x="305" y="235" text-anchor="middle" fill="#228B22" font-size="13" font-weight="bold">🎯 {difficulty_str}</text>
-  <text x="305" y="250" text-anchor="middle" fill="#6A5ACD" font-size="10" font-weight="bold">LEVEL</text>
-  
-  <!-- Date/Time with cute frame -->
-  <rect x="100" y="275" width="200" height="20" rx="10" fill="#FFF8DC" stroke="#FFB6C1" stroke-width="2"/>
-  <text x="200" y="288" text-anchor="middle" fill="#6A5ACD" font-size="10" font-weight="bold">📅 {date_str} ⏰ {time_str}</text>
-  
-  <!-- Cute Corner Decorations (Hearts and Stars) -->
-  <text x="30" y="35" fill="#FF69B4" font-size="16">💖</text>
-  <text x="360" y="35" fill="#98FB98" font-size="16">⭐</text>
-  <text x="30" y="280" fill="#FFD700" font-size="16">✨</text>
-  <text x="360" y="280" fill="#FFB6C1" font-size="16">💕</text>
-  
-  <!-- Small decorative elements -->
-  <circle cx="50" cy="100" r="3" fill="#FFB6C1" opacity="0.6"/>
-  <circle cx="350" cy="120" r="3" fill="#98FB98" opacity="0.6"/>
-  <circle cx="50" cy="200" r="3" fill="#FFD700" opacity="0.6"/>
-  <circle cx="350" cy="180" r="3" fill="#87CEEB" opacity="0.6"/>
-</svg>'''
-
@@ -6,16 +6,19 @@ with route attributes using similarity scoring.
 
 Enhanced with feedback-aware recommendations that learn from user feedback.
 """
-import json
+import heapq
 import math
-import random
 import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Optional
 
-from sqlalchemy import select
+import orjson
+from sqlalchemy import Text, cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer_group
 
 from app.models.entities import Route, DemoProfile, Breakpoint, ProfileFeedback
 from app.logger import get_logger, log_business_logic
@@ -50,45 +53,94 @@ FEEDBACK_PENALTY_MULTIPLIERS = {
 FEEDBACK_FILTER_THRESHOLD = 4  # Filter routes with 4+ feedback entries (after 3rd feedback shows at 1%)
 TIME_DECAY_HALF_LIFE_DAYS = 30.0  # 30 days half-life for feedback weight
 
+# Difficulty decay 0.5^distance for the distances that occur in practice: route
+# difficulties are integers and feedback moves the user range in 0.5 steps
+_DIFFICULTY_DECAY = {steps / 2: 0.5 ** (steps / 2) for steps in range(13)}
 
-def extract_route_vector(route: Route) -> dict:
+# Interned tag vocabulary: lowercased tag -> bit position in the tag masks.
+# Grows with the distinct tags seen, which is a small, fixed set per catalogue.
+_TAG_BITS: dict[str, int] = {}
+
+
+@dataclass(slots=True)
+class RouteView:
+    """
+    Lightweight read-only view of the Route columns used for CBF scoring.
+
+    Built from the selected column values so scoring never hydrates full ORM
+    instances (or their large text columns such as gpx_data_raw).
+    """
+
+    id: int
+    difficulty: Optional[int]
+    length_meters: Optional[float]
+    tags_json: Optional[list[Any]]
+
+
+def extract_route_vector(route: Route | RouteView) -> dict:
     """
     Extract route features into a comparable vector.
     
     Parameters
     ----------
-    route : Route
-        Route entity from database
+    route : Route | RouteView
+        Route entity (or scoring view) from database
     
     Returns
     -------
     dict
         Route vector with difficulty, length_km, and tags
     """
-    # Parse tags from JSON
+    # Tags are stored as a JSON array (already deserialized by the column type)
     tags = []
-    if route.tags_json:
-        try:
-            tags = json.loads(route.tags_json)
-            if isinstance(tags, list):
-                # Flatten if nested or extract tag names
-                flat_tags = []
-                for tag in tags:
-                    if isinstance(tag, str):
-                        flat_tags.append(tag.lower())
-                    elif isinstance(tag, dict) and "name" in tag:
-                        flat_tags.append(tag["name"].lower())
-                tags = flat_tags
-        except (json.JSONDecodeError, TypeError):
-            tags = []
+    if isinstance(route.tags_json, list):
+        # Flatten if nested or extract tag names
+        for tag in route.tags_json:
+            if isinstance(tag, str):
+                tags.append(tag.lower())
+            elif isinstance(tag, dict) and "name" in tag:
+                tags.append(tag["name"].lower())
     
     return {
         "difficulty": route.difficulty if route.difficulty is not None else 0,
         "length_km": (route.length_meters / 1000.0) if route.length_meters else 0.0,
         "tags": tags,
+        "tag_mask": _tag_mask(tags),
     }
 
 
+def _tag_mask(tags) -> int:
+    """
+    Encode lowercased tags as a bitmask over the interned tag vocabulary.
+    
+    Jaccard similarity of two tag sets is then
+    ``(a & b).bit_count() / (a | b).bit_count()``, with no per-pair set building.
+    """
+    mask = 0
+    for tag in tags:
+        bit = _TAG_BITS.get(tag)
+        if bit is None:
+            bit = _TAG_BITS[tag] = len(_TAG_BITS)
+        mask |= 1 << bit
+    return mask
+
+
+@lru_cache(maxsize=65536)
+def _cached_route_vector(
+    difficulty: Optional[int], length_meters: Optional[float], tags_text: Optional[str]
+) -> dict:
+    """
+    Route vector for the given scoring columns, memoized on their raw values.
+    
+    ``tags_text`` is the undecoded JSON of ``tags_json``, so a cache hit skips
+    both the JSON decode and the tag normalization, and an edited route gets a
+    new entry. Routes with identical columns share one vector, which callers
+    must treat as read-only.
+    """
+    tags_json = orjson.loads(tags_text) if tags_text is not None else None
+    return extract_route_vector(RouteView(0, difficulty, length_meters, tags_json))
+
+
 def calculate_difficulty_score(user_difficulty_range: list[int], route_difficulty: int) -> float:
     """
     Calculate difficulty match score.
@@ -121,8 +173,9 @@ def calculate_difficulty_score(user_difficulty_range: list[int], route_difficult
     else:
         distance = route_difficulty - max_diff
     
-    # Exponential decay: 0.5^distance
-    return max(0.0, 0.5 ** distance)
+    # Exponential decay: 0.5^distance (always positive, so no clamping needed)
+    decay = _DIFFICULTY_DECAY.get(distance)
+    return decay if decay is not None else 0.5 ** distance
 
 
 def calculate_distance_score(
@@ -162,8 +215,8 @@ def calculate_distance_score(
     else:
         distance_ratio = (route_length_km - user_max_km) / user_max_km
     
-    # Exponential decay based on how far outside the range
-    return max(0.0, 0.7 ** distance_ratio)
+    # Exponential decay based on how far outside the range (always positive)
+    return 0.7 ** distance_ratio
 
 
 def calculate_tag_score(user_tags: list[str], route_tags: list[str]) -> float:
@@ -219,57 +272,142 @@ def calculate_cbf_score(user_vector: dict, route_vector: dict) -> tuple[float, d
     tuple[float, dict]
         Overall similarity score between 0.0 and 1.0, and score breakdown
     """
-    # Calculate component scores
-    difficulty_score = calculate_difficulty_score(
-        user_vector.get("difficulty_range", [0, 3]),
-        route_vector["difficulty"]
-    )
+    return calculate_cbf_scores(user_vector, [route_vector])[0]
+
+
+def _score_components(
+    user_vector: dict, route_vectors: list[dict]
+) -> list[tuple[float, float, float, float]]:
+    """
+    Scoring kernel: ``(final, difficulty, distance, tag)`` scores per route.
     
-    distance_score = calculate_distance_score(
-        user_vector.get("min_distance_km", 0.0),
-        user_vector.get("max_distance_km", 100.0),
-        route_vector["length_km"]
-    )
+    The formulas of :func:`calculate_difficulty_score`,
+    :func:`calculate_distance_score` and :func:`calculate_tag_score` are
+    inlined into one loop over plain numbers, with every user-side value
+    hoisted into a local, so no function is called per route. Keep the
+    formulas in sync with those functions.
+    """
+    difficulty_range = user_vector.get("difficulty_range", [0, 3])
+    has_difficulty_range = bool(difficulty_range) and len(difficulty_range) >= 2
+    if has_difficulty_range:
+        min_difficulty, max_difficulty = difficulty_range[0], difficulty_range[1]
+    min_km = user_vector.get("min_distance_km", 0.0)
+    max_km = user_vector.get("max_distance_km", 100.0)
+    user_tags = user_vector.get("preferred_tags", [])
+    user_tag_mask = _tag_mask({tag.lower() for tag in user_tags})
+    untagged_route_score = 0.2 if user_tags else 0.5
+    difficulty_weight = SCORE_WEIGHTS["difficulty"]
+    distance_weight = SCORE_WEIGHTS["distance"]
+    tags_weight = SCORE_WEIGHTS["tags"]
+    difficulty_decay = _DIFFICULTY_DECAY
+    
+    results = []
+    for route_vector in route_vectors:
+        # Difficulty: 1.0 inside the user's range, 0.5^distance outside it
+        difficulty = route_vector["difficulty"]
+        if not has_difficulty_range:
+            difficulty_score = 0.5
+        elif min_difficulty <= difficulty <= max_difficulty:
+            difficulty_score = 1.0
+        else:
+            distance = min_difficulty - difficulty if difficulty < min_difficulty else difficulty - max_difficulty
+            difficulty_score = difficulty_decay.get(distance)
+            if difficulty_score is None:
+                difficulty_score = 0.5 ** distance
+        
+        # Distance: 1.0 inside the user's range, 0.7^ratio outside it
+        length_km = route_vector["length_km"]
+        if length_km == 0.0:
+            distance_score = 0.3
+        elif min_km <= length_km <= max_km:
+            distance_score = 1.0
+        elif length_km < min_km:
+            distance_score = 0.7 ** ((min_km - length_km) / max_km)
+        else:
+            distance_score = 0.7 ** ((length_km - max_km) / max_km)
+        
+        # Tags: Jaccard similarity as popcounts of the intersection and union masks
+        route_tags = route_vector["tags"]
+        if not route_tags:
+            tag_score = untagged_route_score
+        elif not user_tags:
+            tag_score = 0.2
+        else:
+            route_tag_mask = route_vector.get("tag_mask")
+            if route_tag_mask is None:
+                route_tag_mask = _tag_mask(route_tags)
+            tag_score = (user_tag_mask & route_tag_mask).bit_count() / (user_tag_mask | route_tag_mask).bit_count()
+        
+        final_score = (
+            difficulty_weight * difficulty_score +
+            distance_weight * distance_score +
+            tags_weight * tag_score
+        )
+        results.append((final_score, difficulty_score, distance_score, tag_score))
     
-    tag_score = calculate_tag_score(
-        user_vector.get("preferred_tags", []),
-        route_vector["tags"]
-    )
+    return results
+
+
+def calculate_cbf_scores(user_vector: dict, route_vectors: list[dict]) -> list[tuple[float, dict]]:
+    """
+    Calculate CBF similarity scores for many routes against one user.
     
-    # Weighted average
-    final_score = (
-        SCORE_WEIGHTS["difficulty"] * difficulty_score +
-        SCORE_WEIGHTS["distance"] * distance_score +
-        SCORE_WEIGHTS["tags"] * tag_score
-    )
+    Batch form of :func:`calculate_cbf_score`. The scores come from the
+    :func:`_score_components` kernel, which resolves the user's preferences
+    once per batch; this adds the per-route score breakdown.
     
-    # Return score and breakdown
-    score_breakdown = {
+    Parameters
+    ----------
+    user_vector : dict
+        User preference vector with difficulty_range, min/max_distance_km, preferred_tags
+    route_vectors : list[dict]
+        Route feature vectors from :func:`extract_route_vector`
+    
+    Returns
+    -------
+    list[tuple[float, dict]]
+        Score and score breakdown for each route, in input order
+    """
+    return [
+        (scores[0], _score_breakdown(user_vector, route_vector, scores))
+        for route_vector, scores in zip(route_vectors, _score_components(user_vector, route_vectors))
+    ]
+
+
+def _score_breakdown(
+    user_vector: dict, route_vector: dict, scores: tuple[float, float, float, float]
+) -> dict:
+    """
+    Build the nested score breakdown of one route from its kernel scores.
+    """
+    final_score, difficulty_score, distance_score, tag_score = scores
+    difficulty_weight = SCORE_WEIGHTS["difficulty"]
+    distance_weight = SCORE_WEIGHTS["distance"]
+    tags_weight = SCORE_WEIGHTS["tags"]
+    return {
         "difficulty": {
             "score": difficulty_score,
-            "weight": SCORE_WEIGHTS["difficulty"],
-            "weighted_score": SCORE_WEIGHTS["difficulty"] * difficulty_score,
+            "weight": difficulty_weight,
+            "weighted_score": difficulty_weight * difficulty_score,
             "user_range": user_vector.get("difficulty_range", [0, 3]),
             "route_value": route_vector["difficulty"],
         },
         "distance": {
             "score": distance_score,
-            "weight": SCORE_WEIGHTS["distance"],
-            "weighted_score": SCORE_WEIGHTS["distance"] * distance_score,
+            "weight": distance_weight,
+            "weighted_score": distance_weight * distance_score,
             "user_range": [user_vector.get("min_distance_km", 0.0), user_vector.get("max_distance_km", 100.0)],
             "route_value": route_vector["length_km"],
         },
         "tags": {
             "score": tag_score,
-            "weight": SCORE_WEIGHTS["tags"],
-            "weighted_score": SCORE_WEIGHTS["tags"] * tag_score,
+            "weight": tags_weight,
+            "weighted_score": tags_weight * tag_score,
             "user_tags": user_vector.get("preferred_tags", []),
             "route_tags": route_vector["tags"],
         },
         "total": final_score,
     }
-    
-    return final_score, score_breakdown
 
 
 def calculate_time_decay_weight(days_ago: float, half_life_days: float = TIME_DECAY_HALF_LIFE_DAYS) -> float:
@@ -443,13 +581,18 @@ def calculate_feedback_penalty(
         - 0.1 if 2 feedbacks (10%)
         - 0.01 if 3+ feedbacks (1%)
     """
-    route_feedback = [f for f in feedback_entries if f.route_id == route_id]
-    
-    if not route_feedback:
+    return _feedback_count_penalty(
+        sum(1 for f in feedback_entries if f.route_id == route_id)
+    )
+
+
+def _feedback_count_penalty(feedback_count: int) -> float:
+    """
+    Penalty multiplier for a route with ``feedback_count`` feedback entries.
+    """
+    if not feedback_count:
         return 1.0  # No penalty
     
-    feedback_count = len(route_feedback)
-    
     # Apply penalty based on feedback count
     if feedback_count >= 3:
         return FEEDBACK_PENALTY_MULTIPLIERS[3]  # 1%
@@ -459,6 +602,48 @@ def calculate_feedback_penalty(
         return FEEDBACK_PENALTY_MULTIPLIERS[1]  # 50%
 
 
+async def _load_routes_with_relations(db: AsyncSession, route_ids: list[int]) -> list[Route]:
+    """
+    Load full Route entities (with breakpoints, mini quests and the deferred
+    payload columns) for the given IDs.
+
+    The returned list preserves the order of ``route_ids``; missing IDs are skipped.
+    """
+    if not route_ids:
+        return []
+    query_with_relations = select(Route).where(Route.id.in_(route_ids)).options(
+        undefer_group("payload"),
+        selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests),
+    )
+    result_with_relations = await db.execute(query_with_relations)
+    routes_with_relations = {r.id: r for r in result_with_relations.scalars().all()}
+    return [routes_with_relations[route_id] for route_id in route_ids if route_id in routes_with_relations]
+
+
+async def _load_random_routes(
+    db: AsyncSession, category_names: Optional[list[str]], limit: int
+) -> list[Route]:
+    """
+    Load a random sample of routes, with their relations, in one query.
+
+    The database draws the sample (``ORDER BY random() LIMIT n``), so only the
+    selected rows are transferred and no second lookup by ID is needed.
+    """
+    query = (
+        select(Route)
+        .options(
+            undefer_group("payload"),
+            selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests),
+        )
+        .order_by(func.random())
+        .limit(limit)
+    )
+    if category_names:
+        query = query.where(Route.category_name.in_(category_names))
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
 async def get_recommended_routes(
     db: AsyncSession,
     profile_id: Optional[int] = None,
@@ -488,38 +673,12 @@ async def get_recommended_routes(
     
     logger.debug(f"🔄 Starting route recommendation calculation: profile_id={profile_id}, category={category}, limit={limit}")
     
-    # Build base query - limit initial load to avoid loading too much data
-    # We'll load relationships only for the final selected routes
-    query = select(Route)
-    
-    # Apply category filter if specified
-    if category and category in CATEGORY_MAPPING:
-        category_names = CATEGORY_MAPPING[category]
-        query = query.where(Route.category_name.in_(category_names))
-    
-    # For personalized recommendations, we need to score all routes first
-    # For random recommendations, we can limit early
-    if profile_id is None:
-        # For random, limit early and load relationships only for selected routes
-        query = query.limit(limit * 3)  # Get 3x limit for better randomization
-    
-    # Execute query (without relationships for now - faster)
-    result = await db.execute(query)
-    routes = list(result.scalars().all())
+    category_names = CATEGORY_MAPPING.get(category) if category else None
     
     # If no profile_id, return random routes
     if profile_id is None:
-        logger.debug(f"🎲 Random recommendation mode: selecting {limit} routes from {len(routes)} candidates")
-        random.shuffle(routes)
-        selected_routes = routes[:limit]
-        # Now load relationships only for selected routes
-        route_ids = [r.id for r in selected_routes]
-        query_with_relations = select(Route).where(Route.id.in_(route_ids)).options(
-            selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests)
-        )
-        result_with_relations = await db.execute(query_with_relations)
-        routes_with_relations = {r.id: r for r in result_with_relations.scalars().all()}
-        final_routes = [routes_with_relations[r.id] for r in selected_routes if r.id in routes_with_relations]
+        logger.debug(f"🎲 Random recommendation mode: selecting {limit} routes")
+        final_routes = await _load_random_routes(db, category_names, limit)
         duration_ms = (time.time() - start_time) * 1000
         logger.info(f"✅ Random recommendation completed: returned {len(final_routes)} routes, duration={duration_ms:.2f}ms")
         return final_routes
@@ -529,16 +688,48 @@ async def get_recommended_routes(
     profile = await db.get(DemoProfile, profile_id)
     if not profile or not profile.user_vector_json:
         logger.warning(f"⚠️ User profile or preference vector not found, falling back to random recommendations: profile_id={profile_id}")
-        random.shuffle(routes)
-        return routes[:limit]
+        return await _load_random_routes(db, category_names, limit)
+    
+    user_vector = profile.user_vector_json
+    if not isinstance(user_vector, dict):
+        logger.warning(f"⚠️ Invalid user preference vector, falling back to random recommendations: profile_id={profile_id}")
+        return await _load_random_routes(db, category_names, limit)
+    logger.debug(f"✅ User preference vector loaded: {user_vector}")
+    
+    # Per-route feedback counts for this profile, aggregated by the database
+    feedback_counts = (
+        select(ProfileFeedback.route_id, func.count().label("feedback_count"))
+        .where(ProfileFeedback.demo_profile_id == profile_id)
+        .group_by(ProfileFeedback.route_id)
+        .subquery()
+    )
+    
+    # Build base query - only the columns needed for scoring, with tags_json as its
+    # raw JSON text so it is only decoded when the route vector is not cached yet,
+    # and the route's feedback count (NULL without feedback)
+    # We'll load full routes with relationships only for the final selected routes
+    query = select(
+        Route.id,
+        Route.difficulty,
+        Route.length_meters,
+        cast(Route.tags_json, Text),
+        feedback_counts.c.feedback_count,
+    ).outerjoin(feedback_counts, feedback_counts.c.route_id == Route.id)
     
-    try:
-        user_vector = json.loads(profile.user_vector_json)
-        logger.debug(f"✅ User preference vector parsed successfully: {user_vector}")
-    except (json.JSONDecodeError, TypeError) as e:
-        logger.warning(f"⚠️ Failed to parse user preference vector, falling back to random recommendations: {e}")
-        random.shuffle(routes)
-        return routes[:limit]
+    # Apply category filter if specified
+    if category_names:
+        query = query.where(Route.category_name.in_(category_names))
+    
+    # Execute query (columns only, no ORM hydration - faster)
+    result = await db.execute(query)
+    
+    # Build route vectors dictionary, memoized on the scoring column values
+    route_vectors = {}
+    route_feedback_counts = {}
+    for route_id, difficulty, length_meters, tags_text, feedback_count in result.all():
+        route_vectors[route_id] = _cached_route_vector(difficulty, length_meters, tags_text)
+        if feedback_count:
+            route_feedback_counts[route_id] = feedback_count
     
     # Fetch user feedback entries for feedback-aware recommendations
     logger.debug(f"🔍 Fetching user feedback entries: profile_id={profile_id}")
@@ -549,11 +740,6 @@ async def get_recommended_routes(
     feedback_entries = list(feedback_result.scalars().all())
     logger.debug(f"📊 Number of user feedback entries: {len(feedback_entries)}")
     
-    # Build route vectors dictionary for feedback processing
-    route_vectors = {}
-    for route in routes:
-        route_vectors[route.id] = extract_route_vector(route)
-    
     # Adjust user vector based on feedback (learn from user preferences)
     if feedback_entries:
         logger.debug("🔄 Adjusting preference vector based on user feedback...")
@@ -568,73 +754,61 @@ async def get_recommended_routes(
         logger.debug("ℹ️ No user feedback available, using original preference vector")
     
     # Calculate CBF scores for all routes with feedback-aware scoring
-    logger.debug(f"📊 Starting CBF score calculation: total_routes={len(routes)}")
-    route_scores = []
-    for route in routes:
-        route_vector = route_vectors[route.id]
-        
-        # Check if route should be filtered (too many feedback entries)
-        route_feedback_count = sum(
-            1 for f in feedback_entries if f.route_id == route.id
-        )
+    logger.debug(f"📊 Starting CBF score calculation: total_routes={len(route_vectors)}")
+    candidates = []
+    for route_id in route_vectors:
+        # Check if route should be filtered (too many feedback entries). Filtered
+        # routes stay in route_vectors: their feedback still adjusts the user vector
+        route_feedback_count = route_feedback_counts.get(route_id, 0)
         if route_feedback_count >= FEEDBACK_FILTER_THRESHOLD:
             # Skip routes with 4+ negative feedback entries (after showing at 1% for 3 feedbacks)
             continue
-        
-        # Calculate base CBF score using adjusted user vector
-        base_score, score_breakdown = calculate_cbf_score(
-            adjusted_user_vector,
-            route_vector
-        )
-        
+        candidates.append((route_id, route_feedback_count))
+    
+    # Calculate base CBF scores for all candidates in one batch using adjusted user vector.
+    # Only the flat kernel scores are kept per route; the nested breakdown is built
+    # below for the returned routes alone
+    base_scores = _score_components(
+        adjusted_user_vector,
+        [route_vectors[route_id] for route_id, _ in candidates]
+    )
+    
+    route_scores = []
+    for (route_id, route_feedback_count), scores in zip(candidates, base_scores):
         # Apply feedback penalty
-        penalty_multiplier = calculate_feedback_penalty(route.id, feedback_entries)
-        final_score = base_score * penalty_multiplier
+        final_score = scores[0] * _feedback_count_penalty(route_feedback_count)
+        route_scores.append((route_id, final_score, route_feedback_count, scores))
+    
+    # Select the top N by score (descending) without sorting every candidate;
+    # ties keep their scan order, exactly as a stable full sort would
+    top_route_scores = heapq.nlargest(limit, route_scores, key=itemgetter(1))
+    logger.debug(f"📊 CBF score calculation completed: valid_routes={len(route_scores)}")
+    
+    # Log top scores for debugging
+    for idx, (route_id, score, _, _) in enumerate(top_route_scores[:3], 1):
+        logger.debug(f"  {idx}. Route {route_id}: score={score:.4f}")
+    
+    top_scores = {}
+    for route_id, final_score, route_feedback_count, scores in top_route_scores:
+        score_breakdown = _score_breakdown(adjusted_user_vector, route_vectors[route_id], scores)
         
         # Update score breakdown with feedback information
+        penalty_multiplier = _feedback_count_penalty(route_feedback_count)
         score_breakdown["feedback_adjusted"] = True
-        score_breakdown["base_score"] = base_score
+        score_breakdown["base_score"] = scores[0]
         score_breakdown["final_score"] = final_score
         if penalty_multiplier < 1.0:
             score_breakdown["feedback_penalty"] = penalty_multiplier
             score_breakdown["feedback_count"] = route_feedback_count
         
-        route_scores.append((route, final_score, score_breakdown))
-    
-    # Sort by score (descending) and return top N with scores
-    route_scores.sort(key=lambda x: x[1], reverse=True)
-    logger.debug(f"📊 CBF score calculation completed: valid_routes={len(route_scores)}")
-    
-    # Log top scores for debugging
-    if route_scores:
-        top_3 = route_scores[:3]
-        for idx, (route, score, _) in enumerate(top_3, 1):
-            logger.debug(f"  {idx}. Route {route.id}: score={score:.4f}")
-    
-    # Store scores as route attributes for API response
-    for route, score, score_breakdown in route_scores[:limit]:
-        route.recommendation_score = score
-        route.recommendation_score_breakdown = score_breakdown
-    
-    recommended_routes = [route for route, score, _ in route_scores[:limit]]
+        top_scores[route_id] = (final_score, score_breakdown)
     
     # Now load relationships only for the final selected routes (much faster)
-    route_ids = [r.id for r in recommended_routes]
-    query_with_relations = select(Route).where(Route.id.in_(route_ids)).options(
-        selectinload(Route.breakpoints).selectinload(Breakpoint.mini_quests)
-    )
-    result_with_relations = await db.execute(query_with_relations)
-    routes_with_relations = {r.id: r for r in result_with_relations.scalars().all()}
+    final_routes = await _load_routes_with_relations(db, list(top_scores))
     
-    # Preserve scores and return routes with loaded relationships, maintaining order
-    final_routes = []
-    for route in recommended_routes:
-        if route.id in routes_with_relations:
-            final_route = routes_with_relations[route.id]
-            # Preserve scores
-            final_route.recommendation_score = route.recommendation_score
-            final_route.recommendation_score_breakdown = route.recommendation_score_breakdown
-            final_routes.append(final_route)
+    # Store scores as route attributes for API response
+    for final_route in final_routes:
+        final_route.recommendation_score, final_route.recommendation_score_breakdown = top_scores[final_route.id]
     
     duration_ms = (time.time() - start_time) * 1000
     log_business_logic(
@@ -643,7 +817,7 @@ async def get_recommended_routes(
         "recommended routes",
         entity_id=profile_id,
         routes_count=len(final_routes),
-        total_candidates=len(routes),
+        total_candidates=len(route_vectors),
         feedback_count=len(feedback_entries)
     )
     
@@ -14,6 +14,7 @@ import os
 from pathlib import Path
 from typing import Any, Optional
 
+from app.llm_logger import log_llm_output
 from app.models.entities import Route, Breakpoint
 
 
@@ -468,7 +469,7 @@ def _generate_quiz_question(
     }
 
 
-async def generate_story_for_route(
+def generate_story_for_route(
     route: Route,
     breakpoints: list[Breakpoint],
     narrative_style: str = "adventure"
@@ -565,7 +566,6 @@ async def generate_story_for_route(
     print("="*80 + "\n")
     
     # Log to UI
-    from app.llm_logger import log_llm_output
     log_llm_output(
         message_type="skeleton",
         title=f"📖 Story Generated: {skeleton.get('title', 'Adventure')}",
@@ -599,6 +599,6 @@ def _format_route_info(route: Route) -> dict:
         "location": route.category_name or "Unknown",
         "distance_km": round(route.length_meters / 1000, 1) if route.length_meters else 0,
         "difficulty": route.difficulty or 0,
-        "tags": json.loads(route.tags_json) if route.tags_json else [],
+        "tags": route.tags_json or [],
         "description": route.short_description or ""
     }
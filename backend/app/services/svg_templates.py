@@ -5,7 +5,6 @@ These templates are Harry Potter / magical themed pixel art designs.
 
 import random
 from datetime import datetime
-from typing import Dict
 
 # 10 different magical SVG templates with placeholders
 SVG_TEMPLATES = [
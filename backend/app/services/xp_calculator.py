@@ -6,7 +6,6 @@ This service calculates XP breakdown for completing routes, including:
 - Quest XP (from completed mini quests)
 - Difficulty multiplier
 """
-from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -24,7 +23,7 @@ DIFFICULTY_MULTIPLIER = {
 
 async def calculate_route_completion_xp(
     route: Route,
-    completed_quest_ids: List[int],
+    completed_quest_ids: list[int],
     db: AsyncSession
 ) -> dict:
     """
@@ -38,11 +38,90 @@ class Settings(BaseSettings):
         env="OLLAMA_MODEL",
         description="Ollama model name (llama3.1:8b recommended for best results)",
     )
+    ollama_model_short: str = Field(
+        default="",
+        env="OLLAMA_MODEL_SHORT",
+        description="Smaller model for short post-run summaries, e.g. llama3.2:3b-instruct-q4_K_M (empty = use ollama_model)",
+    )
     ollama_timeout: int = Field(
         default=120,
         env="OLLAMA_TIMEOUT",
         description="Timeout in seconds for Ollama API calls (increased for batch story generation)",
     )
+    ollama_http2: bool = Field(
+        default=False,
+        env="OLLAMA_HTTP2",
+        description="Use HTTP/2 for Ollama calls; only for an https:// OLLAMA_API_URL behind an h2-terminating proxy (Ollama itself serves HTTP/1.1)",
+    )
+    ollama_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        env="OLLAMA_MAX_CONCURRENCY",
+        description="Maximum number of concurrent Ollama requests per worker process (match the server's OLLAMA_NUM_PARALLEL)",
+    )
+    ollama_num_ctx: int = Field(
+        default=4096,
+        env="OLLAMA_NUM_CTX",
+        description="Context window requested from Ollama; fixed so the loaded model and its KV cache are reused",
+    )
+    ollama_breaker_threshold: int = Field(
+        default=3,
+        env="OLLAMA_BREAKER_THRESHOLD",
+        description="Consecutive Ollama timeouts/connection errors/5xx replies before calls fail fast (0 = disabled)",
+    )
+    ollama_breaker_cooldown: int = Field(
+        default=30,
+        env="OLLAMA_BREAKER_COOLDOWN",
+        description="Seconds Ollama calls fail fast with 503 once the failure threshold is reached",
+    )
+    ollama_prewarm: bool = Field(
+        default=True,
+        env="OLLAMA_PREWARM",
+        description="Load the model and prefill the static prompt prefixes at startup",
+    )
+    ollama_keep_alive: str = Field(
+        default="60m",
+        env="OLLAMA_KEEP_ALIVE",
+        description="How long Ollama keeps the model (and its prompt KV cache) loaded after a request; -1 keeps it resident",
+    )
+    post_run_fewshot_n: int = Field(
+        default=1,
+        ge=0,
+        le=2,
+        env="POST_RUN_FEWSHOT_N",
+        description="Number of few-shot examples in the post-run summary prompt (0-2)",
+    )
+    response_cache_enabled: bool = Field(
+        default=True,
+        env="RESPONSE_CACHE_ENABLED",
+        description="Cache Ollama responses for identical prompts and generation options",
+    )
+    response_cache_ttl: int = Field(
+        default=3600,
+        env="RESPONSE_CACHE_TTL",
+        description="Default lifetime in seconds of a cached Ollama response",
+    )
+    response_cache_persist: bool = Field(
+        default=True,
+        env="RESPONSE_CACHE_PERSIST",
+        description="Also keep cached Ollama responses on disk so they survive restarts",
+    )
+    response_cache_path: str = Field(
+        default=str(PROJECT_ROOT / "data" / "genai_cache.sqlite3"),
+        env="RESPONSE_CACHE_PATH",
+        description="SQLite file backing the persistent Ollama response cache",
+    )
+    response_cache_max_entries: int = Field(
+        default=2048,
+        env="RESPONSE_CACHE_MAX_ENTRIES",
+        description="Maximum number of cached Ollama responses (least recently used are evicted)",
+    )
+
+    llm_metrics_enabled: bool = Field(
+        default=True,
+        env="LLM_METRICS_ENABLED",
+        description="Record Ollama token counts, throughput and cache hit metrics (GET /api/llm-metrics)",
+    )
 
     # Logging configuration
     log_level: str = Field(
@@ -11,7 +11,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
 from app.database import init_db, get_db_session
 from app.models.entities import Route, Breakpoint
@@ -34,7 +34,11 @@ async def check_generated_stories():
         result = await db.execute(
             select(Route)
             .where(Route.story_prologue_body.isnot(None))
-            .options(selectinload(Route.breakpoints))
+            .options(
+                undefer(Route.story_prologue_body),
+                undefer(Route.story_epilogue_body),
+                selectinload(Route.breakpoints),
+            )
             .order_by(Route.id)
         )
         routes_with_stories = result.scalars().all()
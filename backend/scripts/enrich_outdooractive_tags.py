@@ -55,6 +55,18 @@ def parse_args() -> argparse.Namespace:
         default=0.2,
         help="Delay between batch requests to avoid rate limits (seconds).",
     )
+    parser.add_argument(
+        "--cache-json",
+        type=str,
+        default=os.path.join(ROOT_DIR, "data/outdooractive/tag_cache.json"),
+        help="Cache of previously fetched tour tags, reused across runs.",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=7 * 24 * 3600,
+        help="Seconds a cached tour's tags stay valid (0 disables the cache).",
+    )
     return parser.parse_args()
 
 
@@ -73,6 +85,27 @@ def flatten_tour_ids(payload: dict[str, Any]) -> list[int]:
     return ids
 
 
+def load_tag_cache(cache_path: str, ttl: float) -> dict[int, dict[str, Any]]:
+    """Return the cached {tour_id: {"fetched_at", "tags"}} entries younger than ttl."""
+    if ttl <= 0 or not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, "r", encoding="utf-8") as fp:
+        entries = json.load(fp)
+
+    cutoff = time.time() - ttl
+    return {
+        int(tour_id): entry
+        for tour_id, entry in entries.items()
+        if entry.get("fetched_at", 0) >= cutoff
+    }
+
+
+def save_tag_cache(cache_path: str, cache: dict[int, dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as fp:
+        json.dump({str(tour_id): entry for tour_id, entry in cache.items()}, fp, ensure_ascii=False)
+
+
 def chunked(seq: list[int], size: int) -> list[list[int]]:
     return [seq[i : i + size] for i in range(0, len(seq), size)]
 
@@ -143,11 +176,17 @@ def main() -> None:
     unique_ids = sorted(set(all_ids))
 
     print(f"Unique tours to enrich: {len(unique_ids)}")
-    client = httpx.Client(timeout=30.0)
-    tag_lookup: dict[int, list[dict[str, str]]] = {}
+    tag_cache = load_tag_cache(args.cache_json, args.cache_ttl)
+    tag_lookup: dict[int, list[dict[str, str]]] = {
+        tour_id: tag_cache[tour_id]["tags"] for tour_id in unique_ids if tour_id in tag_cache
+    }
+    # Only tours without a fresh cache entry cost an API request
+    missing_ids = [tour_id for tour_id in unique_ids if tour_id not in tag_lookup]
+    print(f"Tags cached for {len(tag_lookup)} tours, fetching {len(missing_ids)}.")
 
+    client = httpx.Client(timeout=30.0)
     try:
-        for batch in chunked(unique_ids, args.chunk_size):
+        for batch in chunked(missing_ids, args.chunk_size):
             props = fetch_properties_for_ids(
                 client,
                 ids=batch,
@@ -155,11 +194,16 @@ def main() -> None:
                 project=args.project,
             )
             tag_lookup.update(props)
+            fetched_at = time.time()
+            for tour_id, tags in props.items():
+                tag_cache[tour_id] = {"fetched_at": fetched_at, "tags": tags}
             print(f"Fetched tags for batch of {len(batch)} tours.")
             if args.sleep:
                 time.sleep(args.sleep)
     finally:
         client.close()
+        if args.cache_ttl > 0:
+            save_tag_cache(args.cache_json, tag_cache)
 
     enrich_payload_with_tags(payload, tag_lookup=tag_lookup)
 
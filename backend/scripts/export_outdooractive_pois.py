@@ -454,10 +454,14 @@ def main() -> None:
         sys.exit(0)
     print(f"Loaded {len(routes)} routes from the database.")
 
+    # One client for both phases so the POI batches reuse the keep-alive
+    # connection opened by the route batches instead of a new TLS handshake
     client = httpx.Client()
     route_records: list[dict[str, Any]] = []
     route_failures: list[dict[str, Any]] = []
     unique_poi_ids: set[int] = set()
+    poi_records: dict[int, dict[str, Any]] = {}
+    poi_failures: list[dict[str, Any]] = []
 
     try:
         for batch_index, batch in enumerate(chunked(routes, args.route_chunk_size), start=1):
@@ -498,19 +502,12 @@ def main() -> None:
             )
             if args.request_interval > 0:
                 time.sleep(args.request_interval)
-    finally:
-        client.close()
-
-    route_records.sort(key=lambda entry: entry["id"])
-    unique_poi_ids_sorted = sorted(unique_poi_ids)
-    print(f"\nCollected {len(unique_poi_ids_sorted)} unique POI IDs across {len(route_records)} routes.")
 
-    poi_records: dict[int, dict[str, Any]] = {}
-    poi_failures: list[dict[str, Any]] = []
+        route_records.sort(key=lambda entry: entry["id"])
+        unique_poi_ids_sorted = sorted(unique_poi_ids)
+        print(f"\nCollected {len(unique_poi_ids_sorted)} unique POI IDs across {len(route_records)} routes.")
 
-    if unique_poi_ids_sorted:
-        client = httpx.Client()
-        try:
+        if unique_poi_ids_sorted:
             for batch_index, batch in enumerate(chunked(unique_poi_ids_sorted, args.poi_chunk_size), start=1):
                 url = build_oois_url(args.project, batch, args.api_key)
                 try:
@@ -546,8 +543,8 @@ def main() -> None:
                 )
                 if args.request_interval > 0:
                     time.sleep(args.request_interval)
-        finally:
-            client.close()
+    finally:
+        client.close()
 
     output_payload = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
@@ -13,7 +13,8 @@ import asyncio
 import json
 import os
 import re
-from typing import Any
+from itertools import islice
+from typing import Any, Iterator
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -21,7 +22,7 @@ import sys
 
 sys.path.insert(0, ROOT_DIR)
 
-from app.database import get_db, init_db
+from app.database import dialect_insert, get_db_session, init_db
 from app.models.entities import Route
 from app.settings import get_settings
 
@@ -65,20 +66,24 @@ def html_to_text(raw: str | None) -> str | None:
     return normalized or None
 
 
-def load_tours(json_path: str) -> list[dict[str, Any]]:
-    with open(json_path, "r", encoding="utf-8") as fp:
-        payload = json.load(fp)
-
+def iter_tours(payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Yield each tour of the cached payload once, in file order."""
     seen_ids: set[int] = set()
-    tours: list[dict[str, Any]] = []
     for category in payload.get("categories", []):
         for tour in category.get("tours", []):
             tour_id = tour.get("id")
             if tour_id is None or tour_id in seen_ids:
                 continue
-            tours.append(tour)
             seen_ids.add(tour_id)
-    return tours
+            yield tour
+
+
+def load_tours(json_path: str, limit: int | None = None) -> list[dict[str, Any]]:
+    with open(json_path, "r", encoding="utf-8") as fp:
+        payload = json.load(fp)
+
+    # Stop deduplicating once the limit is reached instead of slicing afterwards
+    return list(islice(iter_tours(payload), limit))
 
 
 def compose_short_description(short_text: str | None, long_text: str | None) -> str | None:
@@ -92,12 +97,12 @@ def compose_short_description(short_text: str | None, long_text: str | None) ->
     return long_norm
 
 
-def extract_tag_texts(tour: dict[str, Any]) -> str | None:
+def extract_tag_texts(tour: dict[str, Any]) -> list[str] | None:
     tags = tour.get("tags") or []
     texts = [tag.get("text") for tag in tags if isinstance(tag, dict) and tag.get("text")]
     if not texts:
         return None
-    return json.dumps(texts, ensure_ascii=False)
+    return texts
 
 
 def transform_tour_to_route_fields(tour: dict[str, Any]) -> dict[str, Any]:
@@ -131,12 +136,8 @@ def transform_tour_to_route_fields(tour: dict[str, Any]) -> dict[str, Any]:
 async def upsert_routes(
     tours: list[dict[str, Any]],
     *,
-    limit: int | None,
     dry_run: bool,
 ) -> None:
-    if limit is not None:
-        tours = tours[:limit]
-
     print(f"Prepared {len(tours)} unique tours.")
     if dry_run:
         previews = [tour.get("title", "Untitled") for tour in tours[:5]]
@@ -146,26 +147,28 @@ async def upsert_routes(
     settings = get_settings()
     init_db(settings)
 
-    async with get_db() as session:
-        upserted = 0
-        for tour in tours:
-            route_fields = transform_tour_to_route_fields(tour)
-            route = await session.get(Route, route_fields["id"])
-            if route is None:
-                route = Route(**route_fields)
-                session.add(route)
-            else:
-                for key, value in route_fields.items():
-                    setattr(route, key, value)
-            upserted += 1
+    rows = [transform_tour_to_route_fields(tour) for tour in tours]
+    if not rows:
+        print("Upserted 0 routes.")
+        return
+
+    async with await get_db_session() as session:
+        # One INSERT ... ON CONFLICT (id) DO UPDATE executed for all rows; SQLAlchemy
+        # batches the parameter sets into multi-row VALUES clauses.
+        insert_stmt = dialect_insert(session)(Route)
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[Route.id],
+            set_={key: insert_stmt.excluded[key] for key in rows[0] if key != "id"},
+        )
+        await session.execute(upsert_stmt, rows)
         await session.commit()
-        print(f"Upserted {upserted} routes.")
+        print(f"Upserted {len(rows)} routes.")
 
 
 async def async_main() -> None:
     args = parse_args()
-    tours = load_tours(args.tours_json)
-    await upsert_routes(tours, limit=args.limit, dry_run=args.dry_run)
+    tours = load_tours(args.tours_json, limit=args.limit)
+    await upsert_routes(tours, dry_run=args.dry_run)
 
 
 def main() -> None:
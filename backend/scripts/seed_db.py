@@ -388,13 +388,21 @@ async def seed_database() -> None:
             {
                 "total_xp": 150,
                 "level": 2,
-                "user_vector_json": json.dumps({"fitness": 3, "preference": "hiking", "story_style": "adventure"}),
+                "user_vector_json": {"fitness": 3, "preference": "hiking", "story_style": "adventure"},
+                # Counters for the seeded souvenir below (route 1002)
+                "souvenir_count": 1,
+                "total_distance_m": 8500.0,
+                "completed_types_json": ["hiking"],
                 "genai_welcome_summary": "You are an Adventure Seeker! You love challenging hikes and epic stories.",
             },
             {
                 "total_xp": 50,
                 "level": 1,
-                "user_vector_json": json.dumps({"fitness": 2, "preference": "city_walk", "story_style": "cultural"}),
+                "user_vector_json": {"fitness": 2, "preference": "city_walk", "story_style": "cultural"},
+                # Counters for the seeded souvenir below (route 1001)
+                "souvenir_count": 1,
+                "total_distance_m": 3500.0,
+                "completed_types_json": ["hiking"],
                 "genai_welcome_summary": "You are a Cultural Explorer! You enjoy discovering history and local stories.",
             },
         ]
@@ -414,14 +422,14 @@ async def seed_database() -> None:
                 "route_id": 1002,
                 "total_xp_gained": 120,
                 "genai_summary": "You conquered the alpine trail! The mountain views were breathtaking, and your determination shone through.",
-                "xp_breakdown_json": json.dumps({"base": 80, "difficulty": 30, "quests": 10}),
+                "xp_breakdown_json": {"base": 80, "difficulty": 30, "quests": 10},
             },
             {
                 "demo_profile_id": profiles[1].id,
                 "route_id": 1001,
                 "total_xp_gained": 75,
                 "genai_summary": "You've explored Salzburg's old town beautifully! The Mozart trail has enriched your cultural journey.",
-                "xp_breakdown_json": json.dumps({"base": 50, "quests": 25}),
+                "xp_breakdown_json": {"base": 50, "quests": 25},
             },
         ]
 